@@ -1,5 +1,28 @@
+from app.startup import get_startup_clock
 import reflex as rx
-from app.state import DashboardState
+from reflex.utils import console
+from reflex.vars.base import Var
+from reflex.vars.object import ObjectVar
+from app.state import ROW_HEIGHT, SIDEBAR_ITEMS, VIEWPORT_ROWS, DashboardState
+from app.export import export_api
+from app.ingest import run_ingestion
+from app.metrics import MetricsMiddleware, metrics_api
+from app.rollups import get_rollups
+from app.search import get_search_index
+from app.sketch import get_product_sketches
+from app.sql import get_sql_source
+from app.store import get_store
+from app.topk import get_topk_index
+
+
+def _scroll_top(e: ObjectVar) -> tuple[Var[int]]:
+    return (e.currentTarget.to(dict).scrollTop.to(int),)
+
+
+class ScrollArea(rx.el.Div):
+    """A div whose scroll events carry its scroll offset."""
+
+    on_scroll: rx.EventHandler[_scroll_top]
 
 
 def kpi_card(kpi: dict) -> rx.Component:
@@ -11,17 +34,25 @@ def kpi_card(kpi: dict) -> rx.Component:
             class_name="flex-1",
         ),
         rx.el.div(
-            rx.cond(
-                kpi["change_type"] == "increase",
-                rx.icon("arrow-up", class_name="h-5 w-5 text-green-500"),
-                rx.icon("arrow-down", class_name="h-5 w-5 text-red-500"),
+            rx.match(
+                kpi["change_type"],
+                (
+                    "increase",
+                    rx.icon("arrow-up", class_name="h-5 w-5 text-green-500"),
+                ),
+                (
+                    "decrease",
+                    rx.icon("arrow-down", class_name="h-5 w-5 text-red-500"),
+                ),
+                rx.icon("minus", class_name="h-5 w-5 text-gray-400"),
             ),
             rx.el.span(
                 kpi["change"],
-                class_name=rx.cond(
-                    kpi["change_type"] == "increase",
-                    "text-green-600 font-semibold",
-                    "text-red-600 font-semibold",
+                class_name=rx.match(
+                    kpi["change_type"],
+                    ("increase", "text-green-600 font-semibold"),
+                    ("decrease", "text-red-600 font-semibold"),
+                    "text-gray-500 font-semibold",
                 ),
             ),
             class_name="flex items-center gap-1 text-sm mt-2",
@@ -57,7 +88,7 @@ def sidebar() -> rx.Component:
             ),
             rx.el.nav(
                 rx.foreach(
-                    DashboardState.sidebar_items,
+                    SIDEBAR_ITEMS,
                     lambda item: nav_item(item, DashboardState.sidebar_collapsed),
                 ),
                 class_name="flex-1 overflow-auto p-4 space-y-2",
@@ -98,9 +129,15 @@ def header() -> rx.Component:
             ),
         ),
         rx.el.div(
+            rx.el.button(
+                "Parquet",
+                on_click=DashboardState.export_data("parquet"),
+                class_name="text-sky-700 px-4 py-2 rounded-lg text-sm font-semibold border border-sky-200 hover:bg-sky-50 transition-colors duration-300",
+            ),
             rx.el.button(
                 "Export Data",
                 rx.icon("download", class_name="ml-2 h-4 w-4"),
+                on_click=DashboardState.export_data("csv"),
                 class_name="bg-sky-600 text-white px-4 py-2 rounded-lg text-sm font-semibold flex items-center shadow-[0px_1px_3px_rgba(0,0,0,0.12)] hover:bg-sky-700 transition-colors duration-300",
             ),
             class_name="flex items-center gap-4",
@@ -129,6 +166,39 @@ def time_granularity_toggle() -> rx.Component:
     )
 
 
+def chart_zoom_controls() -> rx.Component:
+    """Buttons to zoom and pan the sales chart window."""
+    button_class = (
+        "p-1.5 text-gray-600 bg-white hover:bg-gray-100 rounded-lg disabled:opacity-50"
+    )
+    return rx.el.div(
+        rx.el.button(
+            rx.icon("chevron-left", class_name="h-4 w-4"),
+            on_click=DashboardState.pan_chart(-0.5),
+            disabled=~DashboardState.chart_zoomed,
+            class_name=button_class,
+        ),
+        rx.el.button(
+            rx.icon("zoom-in", class_name="h-4 w-4"),
+            on_click=DashboardState.zoom_chart(0.5),
+            class_name=button_class,
+        ),
+        rx.el.button(
+            rx.icon("zoom-out", class_name="h-4 w-4"),
+            on_click=DashboardState.zoom_chart(2),
+            disabled=~DashboardState.chart_zoomed,
+            class_name=button_class,
+        ),
+        rx.el.button(
+            rx.icon("chevron-right", class_name="h-4 w-4"),
+            on_click=DashboardState.pan_chart(0.5),
+            disabled=~DashboardState.chart_zoomed,
+            class_name=button_class,
+        ),
+        class_name="flex items-center p-1 space-x-1 bg-gray-100 rounded-lg",
+    )
+
+
 def sales_chart() -> rx.Component:
     """The sales trend line chart."""
     return rx.el.div(
@@ -142,7 +212,11 @@ def sales_chart() -> rx.Component:
                     class_name="text-sm text-gray-500",
                 ),
             ),
-            time_granularity_toggle(),
+            rx.el.div(
+                chart_zoom_controls(),
+                time_granularity_toggle(),
+                class_name="flex items-center gap-2",
+            ),
             class_name="flex justify-between items-center mb-4",
         ),
         rx.recharts.line_chart(
@@ -181,7 +255,16 @@ def sales_chart() -> rx.Component:
 def filters() -> rx.Component:
     """Component containing all filter controls."""
     return rx.el.div(
-        rx.el.h3("Filters", class_name="text-lg font-semibold text-gray-900 mb-4"),
+        rx.el.div(
+            rx.el.h3("Filters", class_name="text-lg font-semibold text-gray-900"),
+            rx.cond(
+                DashboardState.views_loading,
+                rx.icon(
+                    "loader-circle", class_name="h-4 w-4 text-sky-600 animate-spin"
+                ),
+            ),
+            class_name="flex items-center gap-2 mb-4",
+        ),
         rx.el.div(
             rx.el.div(
                 rx.el.label(
@@ -189,11 +272,13 @@ def filters() -> rx.Component:
                     class_name="text-sm font-medium text-gray-700 mb-1",
                 ),
                 rx.el.select(
+                    rx.el.option("All Stores", value=""),
                     rx.foreach(
                         DashboardState.store_locations,
                         lambda location: rx.el.option(location, value=location),
                     ),
                     placeholder="Select a store",
+                    value=DashboardState.selected_store,
                     on_change=DashboardState.set_selected_store,
                     class_name="w-full p-2 border border-gray-300 rounded-lg text-sm",
                 ),
@@ -211,6 +296,9 @@ def filters() -> rx.Component:
                             rx.el.input(
                                 type="checkbox",
                                 id=category.lower(),
+                                checked=DashboardState.selected_categories.contains(
+                                    category
+                                ),
                                 on_change=lambda _: DashboardState.toggle_category(
                                     category
                                 ),
@@ -235,11 +323,13 @@ def filters() -> rx.Component:
                 rx.el.div(
                     rx.el.input(
                         type="date",
+                        value=DashboardState.start_date,
                         on_change=DashboardState.set_start_date,
                         class_name="w-full p-2 border border-gray-300 rounded-lg text-sm",
                     ),
                     rx.el.input(
                         type="date",
+                        value=DashboardState.end_date,
                         on_change=DashboardState.set_end_date,
                         class_name="w-full p-2 border border-gray-300 rounded-lg text-sm",
                     ),
@@ -294,13 +384,98 @@ def table_header(name: str, key: str) -> rx.Component:
     )
 
 
+def product_row(product: rx.Var) -> rx.Component:
+    """A row of the products table."""
+    return rx.el.tr(
+        rx.el.td(
+            product["name"],
+            class_name="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-800",
+        ),
+        rx.el.td(
+            product["units_sold"].to_string(),
+            class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-600",
+        ),
+        rx.el.td(
+            rx.el.span(f"${product['total_revenue']:.2f}"),
+            class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-600",
+        ),
+        style={"height": f"{ROW_HEIGHT}px"},
+        class_name="border-b border-gray-200 hover:bg-gray-50",
+    )
+
+
+def window_spacer(height: rx.Var) -> rx.Component:
+    """An empty row standing in for rows outside the scroll window."""
+    return rx.cond(
+        DashboardState.table_scrolling,
+        rx.el.tr(rx.el.td(col_span=3), style={"height": height}),
+    )
+
+
+def table_pagination() -> rx.Component:
+    """Page controls below the products table, or the count when scrolling."""
+    return rx.cond(
+        DashboardState.table_scrolling,
+        rx.el.p(
+            DashboardState.product_count,
+            " products",
+            class_name="text-sm text-gray-500 mt-4",
+        ),
+        table_pages(),
+    )
+
+
+def table_pages() -> rx.Component:
+    """Page controls below the products table."""
+    return rx.el.div(
+        rx.el.p(
+            "Page ",
+            DashboardState.current_page + 1,
+            " of ",
+            DashboardState.page_count,
+            " · ",
+            DashboardState.product_count,
+            " products",
+            class_name="text-sm text-gray-500",
+        ),
+        rx.el.div(
+            rx.el.button(
+                rx.icon("chevron-left", class_name="h-4 w-4"),
+                on_click=DashboardState.previous_page,
+                disabled=DashboardState.current_page == 0,
+                class_name="p-2 rounded-lg text-gray-600 hover:bg-gray-100 disabled:opacity-40",
+            ),
+            rx.el.button(
+                rx.icon("chevron-right", class_name="h-4 w-4"),
+                on_click=DashboardState.next_page,
+                disabled=DashboardState.current_page + 1 >= DashboardState.page_count,
+                class_name="p-2 rounded-lg text-gray-600 hover:bg-gray-100 disabled:opacity-40",
+            ),
+            class_name="flex items-center gap-2",
+        ),
+        class_name="flex justify-between items-center mt-4",
+    )
+
+
 def top_products_table() -> rx.Component:
     """The data table for top-selling products."""
     return rx.el.div(
         rx.el.div(
             rx.el.div(
-                rx.el.h3(
-                    "Top Products", class_name="text-lg font-semibold text-gray-900"
+                rx.el.div(
+                    rx.el.h3(
+                        "Top Products",
+                        class_name="text-lg font-semibold text-gray-900",
+                    ),
+                    rx.cond(
+                        DashboardState.views_approximate,
+                        rx.el.span(
+                            "Approximate",
+                            title="Estimated from daily summaries; exact totals are on the way.",
+                            class_name="px-2 py-0.5 rounded-full bg-amber-100 text-amber-700 text-xs font-medium",
+                        ),
+                    ),
+                    class_name="flex items-center gap-2",
                 ),
                 rx.el.p(
                     "Best-selling items in the current selection.",
@@ -308,57 +483,96 @@ def top_products_table() -> rx.Component:
                 ),
             ),
             rx.el.div(
-                rx.icon(
-                    "search",
-                    class_name="absolute left-3 top-1/2 -translate-y-1/2 h-5 w-5 text-gray-400",
+                rx.el.div(
+                    rx.icon(
+                        "search",
+                        class_name="absolute left-3 top-1/2 -translate-y-1/2 h-5 w-5 text-gray-400",
+                    ),
+                    rx.el.input(
+                        placeholder="Search products...",
+                        on_change=DashboardState.set_product_search_query.debounce(150),
+                        class_name="w-full max-w-sm pl-10 pr-4 py-2 border border-gray-300 rounded-lg text-sm focus:ring-sky-500 focus:border-sky-500",
+                    ),
+                    class_name="relative",
                 ),
-                rx.el.input(
-                    placeholder="Search products...",
-                    on_change=DashboardState.set_product_search_query.debounce(300),
-                    class_name="w-full max-w-sm pl-10 pr-4 py-2 border border-gray-300 rounded-lg text-sm focus:ring-sky-500 focus:border-sky-500",
+                rx.el.button(
+                    rx.icon(
+                        rx.cond(DashboardState.table_scrolling, "book-open", "rows-3"),
+                        class_name="h-4 w-4",
+                    ),
+                    on_click=DashboardState.toggle_table_scrolling,
+                    title=rx.cond(
+                        DashboardState.table_scrolling,
+                        "Show pages",
+                        "Scroll through all products",
+                    ),
+                    class_name="p-2 rounded-lg text-gray-600 hover:bg-gray-100",
                 ),
-                class_name="relative",
+                class_name="flex items-center gap-2",
             ),
             class_name="flex justify-between items-center mb-4",
         ),
-        rx.el.div(
+        ScrollArea.create(
             rx.el.table(
                 rx.el.thead(
                     rx.el.tr(
                         table_header("Product Name", "name"),
                         table_header("Units Sold", "units_sold"),
                         table_header("Total Revenue", "total_revenue"),
-                    )
+                    ),
+                    class_name="sticky top-0 bg-white",
                 ),
                 rx.el.tbody(
+                    window_spacer(DashboardState.window_padding[0]),
                     rx.foreach(
-                        DashboardState.filtered_and_sorted_products,
-                        lambda product: rx.el.tr(
-                            rx.el.td(
-                                product["name"],
-                                class_name="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-800",
-                            ),
-                            rx.el.td(
-                                product["units_sold"].to_string(),
-                                class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-600",
-                            ),
-                            rx.el.td(
-                                rx.el.span(f"${product['total_revenue']:.2f}"),
-                                class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-600",
-                            ),
-                            class_name="border-b border-gray-200 hover:bg-gray-50",
-                        ),
+                        DashboardState.row_order,
+                        lambda i: product_row(DashboardState.product_rows[i]),
                     ),
+                    window_spacer(DashboardState.window_padding[1]),
                     class_name="bg-white divide-y divide-gray-200",
                 ),
                 class_name="min-w-full divide-y divide-gray-200",
             ),
-            class_name="overflow-hidden border-b border-gray-200 rounded-2xl shadow-[0px_1px_3px_rgba(0,0,0,0.12)]",
+            on_scroll=DashboardState.scroll_table.throttle(100),
+            style=rx.cond(
+                DashboardState.table_scrolling,
+                {"maxHeight": f"{(VIEWPORT_ROWS + 1) * ROW_HEIGHT}px"},
+                {},
+            ),
+            class_name=rx.cond(
+                DashboardState.table_scrolling,
+                "overflow-y-auto border-b border-gray-200 rounded-2xl shadow-[0px_1px_3px_rgba(0,0,0,0.12)]",
+                "overflow-hidden border-b border-gray-200 rounded-2xl shadow-[0px_1px_3px_rgba(0,0,0,0.12)]",
+            ),
         ),
+        table_pagination(),
         class_name="bg-white p-6 rounded-2xl",
     )
 
 
+def warm_up():
+    """Build the shared structures before serving and log the startup phases.
+
+    A SQL source serves every view, so the in-memory structures are only
+    built without one.
+    """
+    clock = get_startup_clock()
+    clock.mark("compile")
+    with clock.phase("warm_sql"):
+        source = get_sql_source()
+    if source is None:
+        for name, build in (
+            ("store", get_store),
+            ("topk", get_topk_index),
+            ("rollups", get_rollups),
+            ("search", get_search_index),
+            ("sketches", get_product_sketches),
+        ):
+            with clock.phase(f"warm_{name}"):
+                build()
+    console.info(clock.finish())
+
+
 def index() -> rx.Component:
     return rx.el.div(
         sidebar(),
@@ -369,6 +583,7 @@ def index() -> rx.Component:
 
 app = rx.App(
     theme=rx.theme(appearance="light"),
+    api_transformer=[export_api, metrics_api],
     head_components=[
         rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
         rx.el.link(rel="preconnect", href="https://fonts.gstatic.com", cross_origin=""),
@@ -378,4 +593,10 @@ app = rx.App(
         ),
     ],
 )
-app.add_page(index)
\ No newline at end of file
+app.add_middleware(MetricsMiddleware())
+app.add_page(
+    index, on_load=[DashboardState.sync_product_rows, DashboardState.watch_kpis]
+)
+app.register_lifespan_task(warm_up)
+app.register_lifespan_task(run_ingestion)
+get_startup_clock().mark("app")
\ No newline at end of file
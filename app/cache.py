@@ -0,0 +1,150 @@
+"""Process-wide LRU/TTL cache for aggregated dashboard views."""
+
+import collections
+import dataclasses
+import functools
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+@dataclasses.dataclass
+class _Flight:
+    """A computation in progress that concurrent callers wait on."""
+
+    generation: int
+    done: threading.Event = dataclasses.field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class ResultCache:
+    """Size-bounded LRU cache with per-entry TTL and single-flight loading.
+
+    Keys are normalized filter tuples, so sessions with the same selections
+    share entries. Concurrent misses on one key run the computation once;
+    the other callers block until it finishes and receive the same value.
+    ``invalidate`` bumps a generation counter, so results computed from data
+    that was replaced mid-flight are returned but never stored.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: collections.OrderedDict[Hashable, tuple[float, Any]] = (
+            collections.OrderedDict()
+        )
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a live value is cached for ``key``; counts neither way."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The live value cached for ``key``, or ``default``; never computes."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], wait: bool = True
+    ) -> Any:
+        """Return the cached value for ``key``, computing it at most once.
+
+        Callers that must not block, such as the event loop, pass ``wait=False``:
+        if another thread is already computing ``key``, they compute their
+        own copy instead of waiting for it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight(self._generation)
+                self.misses += 1
+            elif wait:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+        if not leader:
+            if not wait:
+                return compute()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None and flight.generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None):
+        """Drop entries whose key matches ``predicate``, or all of them.
+
+        Called by the ingestion side whenever new sales data lands.
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                self._generation += 1
+            else:
+                for key in [k for k in self._entries if predicate(k)]:
+                    del self._entries[key]
+                for key, flight in self._inflight.items():
+                    if predicate(key):
+                        flight.generation = -1
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, int]:
+        """Counters for the metrics endpoint."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+@functools.cache
+def get_result_cache() -> ResultCache:
+    """Return the cache shared by every session in this process."""
+    return ResultCache()
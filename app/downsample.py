@@ -0,0 +1,38 @@
+"""Largest-Triangle-Three-Buckets downsampling of chart series."""
+
+import numpy as np
+
+
+def lttb(values: np.ndarray, budget: int) -> np.ndarray:
+    """Indices of at most ``budget`` points that keep the shape of ``values``.
+
+    Points are evenly spaced on the x axis. The first and last points are
+    always kept; every bucket in between contributes the point forming the
+    largest triangle with the point kept before it and the average of the
+    next bucket, so peaks and troughs survive. Series already within the
+    budget are returned whole.
+    """
+    n = len(values)
+    if n <= budget or budget < 3:
+        return np.arange(n)
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(budget - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_lo, next_hi = hi, edges[bucket + 2]
+            next_x = (next_lo + next_hi - 1) / 2
+            next_y = values[next_lo:next_hi].mean()
+        else:
+            next_x, next_y = n - 1, values[n - 1]
+        x = np.arange(lo, hi)
+        area = np.abs(
+            (previous - next_x) * (values[lo:hi] - values[previous])
+            - (previous - x) * (next_y - values[previous])
+        )
+        previous = lo + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
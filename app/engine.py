@@ -0,0 +1,140 @@
+"""Vectorized filter-and-aggregate engine over the columnar sales store."""
+
+import dataclasses
+import datetime
+
+import numpy as np
+
+from app.parallel import PARALLEL_MIN_ROWS, parallel_sums, worker_count
+from app.store import SalesStore, to_day
+
+
+@dataclasses.dataclass(frozen=True)
+class Filters:
+    """A normalized set of dashboard filter selections.
+
+    An empty ``store`` or ``categories`` means "all"; empty dates leave that
+    side of the range open.
+    """
+
+    store: str = ""
+    categories: tuple[str, ...] = ()
+    start_date: str = ""
+    end_date: str = ""
+
+    @classmethod
+    def from_selection(
+        cls, store: str, categories: list[str], start_date: str, end_date: str
+    ) -> "Filters":
+        return cls(store, tuple(sorted(set(categories))), start_date, end_date)
+
+
+@dataclasses.dataclass
+class Aggregate:
+    """Per-product totals for a filter set.
+
+    Transaction counts and summed squared revenue make averages and
+    variances of transaction revenue derivable without another pass.
+    """
+
+    product_units: np.ndarray
+    product_revenue: np.ndarray
+    product_count: np.ndarray
+    product_revenue_sq: np.ndarray
+
+
+def parse_day(value: str) -> int | None:
+    """Day number for an ISO date string, or None if it is empty or invalid."""
+    try:
+        return to_day(datetime.date.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def date_slice(store: SalesStore, start_date: str, end_date: str) -> slice:
+    """Binary-search the sorted date column for the rows in ``[start, end]``."""
+    lo, hi = 0, len(store)
+    if start_date and (start := parse_day(start_date)) is not None:
+        lo = int(np.searchsorted(store.date, start, side="left"))
+    if end_date and (end := parse_day(end_date)) is not None:
+        hi = int(np.searchsorted(store.date, end, side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def row_mask(store: SalesStore, filters: Filters, rows: slice) -> np.ndarray | None:
+    """Boolean mask over ``rows`` for the store/category filters.
+
+    The selection is a lookup table over (store, category) segment codes, so
+    both filters cost a single gather. Returns None when neither filter
+    narrows the selection.
+    """
+    segments = store.segment_selection(filters.store, filters.categories)
+    return None if segments is None else segments[store.segment[rows]]
+
+
+def partial_sums(
+    product_id: np.ndarray,
+    segment: np.ndarray,
+    units: np.ndarray,
+    revenue: np.ndarray,
+    segments: np.ndarray | None,
+    n_products: int,
+) -> np.ndarray:
+    """Count, units, revenue and squared revenue per product, as 4 rows.
+
+    ``segments`` is the selection from ``SalesStore.segment_selection``.
+    Partial sums of disjoint row ranges add up to the sums of their union.
+    """
+    if segments is not None:
+        # Gather through an index array; cheaper than boolean-indexing each
+        # column separately.
+        selected = np.flatnonzero(segments[segment])
+        product_id = product_id.take(selected)
+        units, revenue = units.take(selected), revenue.take(selected)
+    return np.stack(
+        [
+            np.bincount(product_id, minlength=n_products),
+            np.bincount(product_id, weights=units, minlength=n_products),
+            np.bincount(product_id, weights=revenue, minlength=n_products),
+            np.bincount(product_id, weights=revenue * revenue, minlength=n_products),
+        ]
+    )
+
+
+def aggregate(store: SalesStore, filters: Filters) -> Aggregate:
+    """Compute per-product totals for a filter set.
+
+    Large slices of a shared store are split into partitions aggregated on
+    the worker pool; the rest run in one masked pass in-process.
+    """
+    rows = date_slice(store, filters.start_date, filters.end_date)
+    segments = store.segment_selection(filters.store, filters.categories)
+    sums = None
+    if (
+        store.shared
+        and rows.stop - rows.start >= PARALLEL_MIN_ROWS
+        and worker_count() > 1
+    ):
+        try:
+            sums = parallel_sums(
+                store.shared_columns(), rows, segments, store.n_products
+            )
+        except OSError:
+            # A column file is gone, e.g. that of a pruned snapshot.
+            pass
+    if sums is None:
+        sums = partial_sums(
+            store.product_id[rows],
+            store.segment[rows],
+            store.units[rows],
+            store.revenue[rows],
+            segments,
+            store.n_products,
+        )
+    count, units, revenue, revenue_sq = sums
+    return Aggregate(
+        product_units=units.astype(np.int64),
+        product_revenue=revenue,
+        product_count=count.astype(np.int64),
+        product_revenue_sq=revenue_sq,
+    )
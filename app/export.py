@@ -0,0 +1,198 @@
+"""Streaming CSV/Parquet export of the filtered transaction facts."""
+
+import csv
+import io
+import urllib.parse
+from collections.abc import Iterator
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.engine import Filters, date_slice, row_mask
+from app.ingest import get_ingestor
+from app.search import get_search_index
+from app.sql import get_sql_source
+from app.store import SalesStore, get_store
+
+CHUNK_ROWS = 100_000
+COLUMNS = ("date", "store", "category", "product", "units", "revenue")
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_query(filters: Filters, search: str, fmt: str) -> str:
+    """URL query string that reproduces a session's selections for ``/export``."""
+    return urllib.parse.urlencode(
+        {
+            "store": filters.store,
+            "categories": ",".join(filters.categories),
+            "start": filters.start_date,
+            "end": filters.end_date,
+            "q": search,
+            "format": fmt,
+        }
+    )
+
+
+def iter_chunks(
+    store: SalesStore,
+    filters: Filters,
+    products: np.ndarray | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[dict[str, np.ndarray]]:
+    """Yield the matching rows as column chunks of at most ``chunk_rows`` rows.
+
+    Masks are built one chunk at a time, so memory stays bounded by the chunk
+    size whatever the size of the selection. ``products`` optionally limits
+    the rows to a sorted array of product ids.
+    """
+    rows = date_slice(store, filters.start_date, filters.end_date)
+    allowed = None
+    if products is not None:
+        allowed = np.zeros(store.n_products, dtype=bool)
+        allowed[products] = True
+    store_names = np.array(store.store_names, dtype=object)
+    category_names = np.array(store.category_names, dtype=object)
+    product_names = np.array(store.product_names, dtype=object)
+    for lo in range(rows.start, rows.stop, chunk_rows):
+        chunk = slice(lo, min(lo + chunk_rows, rows.stop))
+        mask = row_mask(store, filters, chunk)
+        if allowed is not None:
+            product_mask = allowed[store.product_id[chunk]]
+            mask = product_mask if mask is None else mask & product_mask
+        selected = (
+            np.arange(chunk.start, chunk.stop)
+            if mask is None
+            else chunk.start + np.flatnonzero(mask)
+        )
+        if not len(selected):
+            continue
+        yield {
+            "date": store.date.take(selected).astype("datetime64[D]"),
+            "store": store_names.take(store.store.take(selected)),
+            "category": category_names.take(store.category.take(selected)),
+            "product": product_names.take(store.product_id.take(selected)),
+            "units": store.units.take(selected),
+            "revenue": store.revenue.take(selected),
+        }
+
+
+def csv_stream(chunks: Iterator[dict[str, np.ndarray]]) -> Iterator[bytes]:
+    """Encode column chunks as CSV, one encoded block per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in chunks:
+        writer.writerows(
+            zip(
+                chunk["date"].astype(str).tolist(),
+                chunk["store"].tolist(),
+                chunk["category"].tolist(),
+                chunk["product"].tolist(),
+                chunk["units"].tolist(),
+                chunk["revenue"].round(2).tolist(),
+            )
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands off what was written since the last drain.
+
+    ``tell`` keeps counting across drains, so the Parquet footer still gets
+    absolute row-group offsets.
+    """
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def parquet_stream(chunks: Iterator[dict[str, np.ndarray]]) -> Iterator[bytes]:
+    """Encode column chunks as a Parquet file, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("date", pa.date32()),
+            ("store", pa.dictionary(pa.int16(), pa.string())),
+            ("category", pa.dictionary(pa.int16(), pa.string())),
+            ("product", pa.string()),
+            ("units", pa.int32()),
+            ("revenue", pa.float64()),
+        ]
+    )
+    sink = _DrainableSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.table(chunk).cast(schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export(request: Request):
+    """Stream the rows matching the query-string filters as CSV or Parquet."""
+    params = request.query_params
+    fmt = params.get("format", "csv")
+    if fmt not in FORMATS:
+        return PlainTextResponse(f"Unsupported format: {fmt}", status_code=400)
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return PlainTextResponse("Parquet export requires pyarrow", status_code=501)
+    filters = Filters.from_selection(
+        params.get("store", ""),
+        [c for c in params.get("categories", "").split(",") if c],
+        params.get("start", ""),
+        params.get("end", ""),
+    )
+    search = params.get("q", "")
+    if source := get_sql_source():
+        chunks = source.facts(filters, search.lower(), CHUNK_ROWS)
+    else:
+        products = None
+        if search:
+            products = get_search_index().matching(search)
+        # Rows are streamed from a frozen view, so batches ingested meanwhile
+        # neither shift nor tear them.
+        with get_ingestor().lock.reading():
+            store = get_store().frozen()
+        chunks = iter_chunks(store, filters, products)
+    encode = csv_stream if fmt == "csv" else parquet_stream
+    # A sync iterator is drained on Starlette's thread pool, keeping the
+    # event loop free while chunks are encoded.
+    return StreamingResponse(
+        encode(chunks),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="sales.{fmt}"'},
+    )
+
+
+export_api = Starlette(routes=[Route("/export", export)])
@@ -0,0 +1,421 @@
+"""Incremental ingestion of appended transaction batches."""
+
+import asyncio
+import contextlib
+import copy
+import csv
+import datetime
+import fcntl
+import functools
+import hashlib
+import math
+import os
+import pathlib
+import tempfile
+import threading
+
+import numpy as np
+
+from app.cache import get_result_cache
+from app.rollups import get_rollups
+from app.sketch import get_product_sketches
+from app.snapshot import (
+    Snapshot,
+    current_name,
+    get_snapshot,
+    install_snapshot,
+    load_snapshot,
+    write_snapshot,
+)
+from app.store import COLUMNS, SalesStore, get_store, to_day
+from app.topk import get_topk_index
+
+# Column order of dropped CSV files and socket lines.
+BATCH_COLUMNS = ("date", "store", "category", "product", "units", "revenue")
+
+# Rows may be dated this many days before the first stored day. Later rows
+# are accepted up to the last stored day or tomorrow, whichever is later.
+# Anything further out is a typo that would pad every day-indexed structure.
+BACKFILL_DAYS = 366
+
+_UNITS_RANGE = np.iinfo(COLUMNS["units"])
+
+
+def parse_rows(
+    store: SalesStore, rows: list[list[str]]
+) -> tuple[dict[str, np.ndarray], int]:
+    """Encode CSV rows into store columns and count the rows rejected.
+
+    Rows naming an unknown store, category or product, with malformed
+    values, with units outside the column's range, a non-finite revenue or
+    a date outside the accepted window are rejected. Blank lines and header
+    rows are skipped.
+    """
+    store_codes = {name: code for code, name in enumerate(store.store_names)}
+    category_codes = {name: code for code, name in enumerate(store.category_names)}
+    product_ids = {name: code for code, name in enumerate(store.product_names)}
+    dates = store.date
+    tomorrow = to_day(datetime.date.today()) + 1
+    first_day = (int(dates[0]) if len(dates) else tomorrow) - BACKFILL_DAYS
+    last_day = max(int(dates[-1]), tomorrow) if len(dates) else tomorrow
+    encoded, rejected = [], 0
+    for row in rows:
+        if not row or tuple(row) == BATCH_COLUMNS:
+            continue
+        try:
+            date, store_name, category, product, units, revenue = row
+            day = to_day(datetime.date.fromisoformat(date))
+            units, revenue = int(units), float(revenue)
+            if not (
+                first_day <= day <= last_day
+                and _UNITS_RANGE.min <= units <= _UNITS_RANGE.max
+                and math.isfinite(revenue)
+            ):
+                raise ValueError
+            encoded.append(
+                (
+                    store_codes[store_name],
+                    category_codes[category],
+                    product_ids[product],
+                    day,
+                    units,
+                    revenue,
+                )
+            )
+        except (KeyError, ValueError):
+            rejected += 1
+    values = list(zip(*encoded)) or [()] * len(COLUMNS)
+    batch = {
+        name: np.array(column, dtype=dtype)
+        for (name, dtype), column in zip(COLUMNS.items(), values)
+    }
+    return batch, rejected
+
+
+class DataLock:
+    """Lets worker threads read the shared structures while no batch changes them.
+
+    Any number of threads may read at once; a writer waits for them to
+    finish and holds off new readers meanwhile, so a steady stream of view
+    refreshes cannot starve ingestion. Not reentrant: a reader must not
+    take it again.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting = 0
+
+    @contextlib.contextmanager
+    def reading(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writing and not self._waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    def _acquire_write(self):
+        with self._condition:
+            self._waiting += 1
+            self._condition.wait_for(lambda: not self._writing and not self._readers)
+            self._waiting -= 1
+            self._writing = True
+
+    def _release_write(self):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def writing(self):
+        """Hold the lock exclusively, waiting for readers off the event loop."""
+        acquire = asyncio.ensure_future(asyncio.to_thread(self._acquire_write))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The thread still takes the lock; hand it back once it has.
+            acquire.add_done_callback(lambda _: self._release_write())
+            raise
+        try:
+            yield
+        finally:
+            self._release_write()
+
+
+class Ingestor:
+    """Applies batches to the shared store and notifies KPI watchers.
+
+    Every structure that summarizes the facts is updated from the batch
+    alone: the rollup cubes, product sketches and top-K totals fold it in,
+    and watchers re-read their KPI cards from the cubes' running sums, so a
+    batch costs O(batch) regardless of how much history is loaded. Batches
+    are applied on the event loop while holding ``lock`` exclusively; code
+    reading the shared structures from a worker thread must hold it via
+    ``reading``.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.rows = 0
+        self.rejected = 0
+        self.rejected_files = 0
+        self.lock = DataLock()
+        self._changed: asyncio.Condition | None = None
+
+    @property
+    def changed(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def apply(self, batch: dict[str, np.ndarray], rejected: int = 0):
+        """Fold one parsed batch into the store and wake the KPI watchers."""
+        self.rejected += rejected
+        if not len(batch["date"]):
+            return
+        async with self.lock.writing():
+            store = get_store()
+            store.append(
+                batch["store"],
+                batch["category"],
+                batch["product_id"],
+                batch["date"],
+                batch["units"],
+                batch["revenue"],
+            )
+            segment = batch["store"].astype(np.int64) * len(store.category_names)
+            segment += batch["category"]
+            get_rollups().append(batch["date"], segment, batch["revenue"])
+            get_product_sketches().append(
+                batch["date"],
+                segment,
+                batch["product_id"],
+                batch["units"],
+                batch["revenue"],
+            )
+            get_topk_index().add_sales(
+                batch["product_id"], batch["units"], batch["revenue"]
+            )
+            get_result_cache().invalidate()
+        self.rows += len(batch["date"])
+        async with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    async def replace(self, snapshot: Snapshot):
+        """Switch to a snapshot written by another process and wake the watchers."""
+        async with self.lock.writing():
+            install_snapshot(snapshot)
+            get_result_cache().invalidate()
+        async with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    async def wait(self, version: int, timeout: float) -> int:
+        """Wait until the version moves past ``version`` or ``timeout`` passes."""
+        async with self.changed:
+            try:
+                await asyncio.wait_for(
+                    self.changed.wait_for(lambda: self.version != version), timeout
+                )
+            except TimeoutError:
+                pass
+            return self.version
+
+
+@functools.cache
+def get_ingestor() -> Ingestor:
+    """Return the ingestor for the shared sales store."""
+    return Ingestor()
+
+
+def _read_csv(path: pathlib.Path) -> list[list[str]]:
+    with path.open(newline="") as f:
+        return list(csv.reader(f))
+
+
+def _parse_file(
+    store: SalesStore, path: pathlib.Path
+) -> tuple[dict[str, np.ndarray], int]:
+    return parse_rows(store, _read_csv(path))
+
+
+def _parse_lines(
+    store: SalesStore, lines: list[bytes]
+) -> tuple[dict[str, np.ndarray], int]:
+    # Undecodable bytes become replacement characters, so the row naming
+    # them is rejected rather than the connection dropped.
+    return parse_rows(
+        store, list(csv.reader(line.decode(errors="replace") for line in lines))
+    )
+
+
+def _dropped(directory: pathlib.Path) -> list[pathlib.Path]:
+    """The ``*.csv`` files in ``directory``, oldest first."""
+    files = []
+    for path in directory.glob("*.csv"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            pass
+    return [path for _, path in sorted(files)]
+
+
+async def watch_drop_dir(directory: pathlib.Path, interval: float = 2.0):
+    """Ingest ``*.csv`` files dropped into ``directory``, oldest first.
+
+    Files are read and parsed off the event loop and moved to ``processed/``
+    once applied. Files that cannot be read or are not CSV text are moved
+    to ``rejected/`` and the watcher carries on with the next one. Writers
+    should create files under another name and rename them into place, so a
+    file is never picked up half-written.
+    """
+    ingestor, store = get_ingestor(), get_store()
+    processed = directory / "processed"
+    rejected = directory / "rejected"
+    processed.mkdir(parents=True, exist_ok=True)
+    rejected.mkdir(exist_ok=True)
+    while True:
+        for path in _dropped(directory):
+            try:
+                batch = await asyncio.to_thread(_parse_file, store, path)
+            except FileNotFoundError:
+                # Removed since it was listed.
+                continue
+            except (OSError, UnicodeDecodeError, csv.Error):
+                ingestor.rejected_files += 1
+                path.replace(rejected / path.name)
+                continue
+            await ingestor.apply(*batch)
+            path.replace(processed / path.name)
+        await asyncio.sleep(interval)
+
+
+async def serve_socket(host: str, port: int):
+    """Accept CSV lines over TCP, one transaction per line.
+
+    A stand-in for a streaming source: the complete lines of each read are
+    applied as one batch.
+    """
+    ingestor, store = get_ingestor(), get_store()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = b""
+        try:
+            while chunk := await reader.read(1 << 16):
+                *lines, pending = (pending + chunk).split(b"\n")
+                if lines:
+                    batch = await asyncio.to_thread(_parse_lines, store, lines)
+                    await ingestor.apply(*batch)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def write_snapshots(root: pathlib.Path, interval: float = 60.0):
+    """Snapshot the shared structures whenever batches have changed them.
+
+    Views of the store and copies of the small rollup, total and sketch
+    arrays are taken on the event loop, between batches; the files are
+    written on a worker thread.
+    """
+    ingestor = get_ingestor()
+    written = 0 if get_snapshot() is not None else None
+    while True:
+        if written != ingestor.version:
+            written = ingestor.version
+            index = get_topk_index()
+            await asyncio.to_thread(
+                write_snapshot,
+                root,
+                get_store().frozen(),
+                copy.deepcopy(get_rollups()),
+                index.values["units_sold"].copy(),
+                index.values["total_revenue"].copy(),
+                get_product_sketches().copy(),
+            )
+        await asyncio.sleep(interval)
+
+
+async def follow_snapshots(root: pathlib.Path, interval: float = 5.0):
+    """Switch to each newer snapshot that appears under ``root``.
+
+    ``CURRENT`` is checked every ``interval`` seconds. A new snapshot is
+    mapped on a worker thread and swapped in on the event loop, and KPI
+    watchers refresh as they do for a batch.
+    """
+    ingestor = get_ingestor()
+    current = snapshot.name if (snapshot := get_snapshot()) is not None else None
+    while True:
+        await asyncio.sleep(interval)
+        if current_name(root) in (None, current):
+            continue
+        if (snapshot := await asyncio.to_thread(load_snapshot, root)) is not None:
+            current = snapshot.name
+            await ingestor.replace(snapshot)
+
+
+def _claim_ingestion(name: str) -> int | None:
+    """Lock ``name`` for this process and return the lock's descriptor.
+
+    Returns None when another process holds it. The lock is released when
+    the process exits, so a restarted worker can take over from one that
+    died.
+    """
+    path = pathlib.Path(tempfile.gettempdir()) / f"retail-ingest-{name}.lock"
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+async def run_ingestion():
+    """Start the sources configured through the environment.
+
+    ``RETAIL_INGEST_DIR`` enables the file drop and ``RETAIL_INGEST_PORT``
+    the socket source on localhost. A process that ingests also writes
+    snapshots to ``RETAIL_SNAPSHOT_DIR`` when it is set, at most every
+    ``RETAIL_SNAPSHOT_INTERVAL`` seconds.
+
+    Only one process per host ingests: the first worker to start claims the
+    sources. The others, and every worker when no source is configured,
+    follow the snapshots in ``RETAIL_SNAPSHOT_DIR``, checking for a new one
+    every ``RETAIL_SNAPSHOT_POLL`` seconds.
+    """
+    directory = os.environ.get("RETAIL_INGEST_DIR")
+    port = os.environ.get("RETAIL_INGEST_PORT")
+    root = os.environ.get("RETAIL_SNAPSHOT_DIR")
+    lock = None
+    if directory or port:
+        lock = _claim_ingestion(
+            hashlib.sha1(f"{directory}:{port}".encode()).hexdigest()[:12]
+        )
+    if lock is None:
+        if root:
+            poll = float(os.environ.get("RETAIL_SNAPSHOT_POLL", "5"))
+            await follow_snapshots(pathlib.Path(root), poll)
+        return
+    sources = []
+    if directory:
+        sources.append(watch_drop_dir(pathlib.Path(directory)))
+    if port:
+        sources.append(serve_socket("127.0.0.1", int(port)))
+    if root:
+        interval = float(os.environ.get("RETAIL_SNAPSHOT_INTERVAL", "60"))
+        sources.append(write_snapshots(pathlib.Path(root), interval))
+    get_ingestor()
+    try:
+        await asyncio.gather(*sources)
+    finally:
+        os.close(lock)
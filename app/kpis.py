@@ -0,0 +1,104 @@
+"""KPI card values for a date window, compared against comparable windows.
+
+Every measure is read from window totals: the rollups' running daily sums,
+where each comparison costs O(segments) however long the window is, or
+one aggregate query against a SQL source. The windows compared are:
+
+* period over period: the window against the equally long one just
+  before it, which for a single day is day over day;
+* year over year: the window against the one 52 weeks earlier, so every
+  day is compared with the same weekday of the previous year.
+"""
+
+import datetime
+from collections.abc import Callable
+
+from app.store import to_day
+
+# Days back to the same weekday a year earlier.
+YEAR_DAYS = 364
+
+
+def _signed(value: float, fmt: str) -> tuple[str, str]:
+    """``value`` formatted with its sign and the direction it shows.
+
+    Values that round to zero at the shown precision are unsigned and
+    neutral, so a tiny drop never reads as "-0.0%".
+    """
+    text = fmt.format(abs(value))
+    if text == fmt.format(0):
+        return text, "neutral"
+    if value > 0:
+        return "+" + text, "increase"
+    return "-" + text, "decrease"
+
+
+def _card(
+    title: str, value: str, delta: float | None, fmt: str = "{:.1f}%"
+) -> dict[str, str]:
+    if delta is None:
+        change, change_type = "n/a", "neutral"
+    else:
+        change, change_type = _signed(delta, fmt)
+    return {
+        "title": title,
+        "value": value,
+        "change": change,
+        "change_type": change_type,
+    }
+
+
+def _growth(current: float, prior: float, prior_count: int) -> float | None:
+    return current / prior - 1 if prior_count and prior else None
+
+
+def kpi_cards(
+    window_totals: Callable[[int, int], tuple[float, int]],
+    start_day: int | None = None,
+    end_day: int | None = None,
+) -> list[dict[str, str]]:
+    """The KPI cards for ``[start_day, end_day]``.
+
+    ``window_totals(start, end)`` returns the revenue and transaction count
+    of the selection over ``[start, end]``, as ``RollupCubes.totals`` does.
+    A missing end is today and a missing start is the end day, so with no
+    dates the cards show today against yesterday.
+    """
+    today = to_day(datetime.date.today())
+    end = today if end_day is None else end_day
+    start = end if start_day is None else min(start_day, end)
+    length = end - start + 1
+
+    def totals(shift: int) -> tuple[float, int]:
+        return window_totals(start - shift, end - shift)
+
+    revenue, count = totals(0)
+    prior_revenue, prior_count = totals(length)
+    year_revenue, year_count = totals(YEAR_DAYS)
+    prior_year_revenue, prior_year_count = totals(length + YEAR_DAYS)
+
+    revenue_change = _growth(revenue, prior_revenue, prior_count)
+    growth = _growth(revenue, year_revenue, year_count)
+    prior_growth = _growth(prior_revenue, prior_year_revenue, prior_year_count)
+    average = revenue / count if count else 0.0
+    prior_average = prior_revenue / prior_count if prior_count else None
+    return [
+        _card(
+            "Today's Revenue" if start == end == today else "Revenue",
+            f"${revenue:,.0f}",
+            None if revenue_change is None else revenue_change * 100,
+        ),
+        _card(
+            "YoY Growth",
+            "n/a" if growth is None else f"{growth * 100:.1f}%",
+            None
+            if growth is None or prior_growth is None
+            else (growth - prior_growth) * 100,
+        ),
+        _card(
+            "Avg. Transaction Value",
+            f"${average:,.2f}",
+            None if prior_average is None else average - prior_average,
+            "${:,.2f}",
+        ),
+    ]
@@ -0,0 +1,354 @@
+"""Event timing histograms, a Prometheus endpoint and a sampling profiler."""
+
+import collections
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+
+import numpy as np
+from reflex.middleware import Middleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.cache import get_result_cache
+from app.startup import get_startup_clock
+
+QUANTILES = (0.5, 0.9, 0.99)
+# Help text of every histogram, keyed by metric name.
+HISTOGRAMS = {
+    "retail_event_seconds": "Time from receiving an event to its final delta.",
+    "retail_handler_seconds": "Event time outside computed var recomputation.",
+    "retail_computed_var_seconds": "Time to recompute a computed var.",
+    "retail_delta_encode_seconds": "Time to JSON-encode a state update.",
+    "retail_delta_bytes": "JSON size of the state updates sent to the client.",
+    "retail_serialize_seconds": "Time to pickle a session state (sampled).",
+    "retail_state_bytes": "Pickled size of a session state (sampled).",
+}
+
+
+class RingHistogram:
+    """The last ``size`` observations of a metric, plus lifetime totals.
+
+    Recording is a list store and two additions, so it is cheap enough for
+    every event. Quantiles are computed over the window only when scraped.
+    """
+
+    def __init__(self, size: int = 2048):
+        self._values = [0.0] * size
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs: tuple[float, ...] = QUANTILES) -> list[float]:
+        window = self._values[: min(self.count, len(self._values))]
+        if not window:
+            return [float("nan")] * len(qs)
+        return np.quantile(window, qs).tolist()
+
+
+def _label_text(labels: tuple[tuple[str, str], ...]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+class Metrics:
+    """Ring-buffer histograms keyed by metric name and label set."""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._histograms: dict[tuple, RingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, RingHistogram(self.window))
+        histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        """The histograms and shared-cache counters in Prometheus text format.
+
+        Histograms are exposed as summaries: quantiles cover the most recent
+        observations in the window, ``_sum`` and ``_count`` the process life.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        lines = []
+        for name, help_text in HISTOGRAMS.items():
+            series = [(key[1], h) for key, h in histograms if key[0] == name]
+            if not series:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+            for labels, histogram in series:
+                for q, value in zip(QUANTILES, histogram.quantiles()):
+                    label_text = _label_text((*labels, ("quantile", str(q))))
+                    lines.append(f"{name}{{{label_text}}} {value:.6g}")
+                label_text = _label_text(labels)
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {histogram.total:.6g}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+        cache = get_result_cache().stats()
+        lines += [
+            "# HELP retail_result_cache_entries Entries in the shared result cache.",
+            "# TYPE retail_result_cache_entries gauge",
+            f"retail_result_cache_entries {cache.pop('entries')}",
+        ]
+        for counter, value in cache.items():
+            name = f"retail_result_cache_{counter}_total"
+            lines += [
+                f"# HELP {name} Shared result cache {counter}.",
+                f"# TYPE {name} counter",
+                f"{name} {value}",
+            ]
+        lines += get_startup_clock().render()
+        return "\n".join(lines) + "\n"
+
+
+@functools.cache
+def get_metrics() -> Metrics:
+    """Return the metrics registry shared by every session in this process."""
+    return Metrics()
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads running events, keeping slow events.
+
+    While at least one event is being profiled, a daemon thread reads the
+    stack of each profiled thread every ``interval`` seconds. Events that
+    take longer than ``slow_ms`` keep their samples as folded stacks, the
+    input format of flame graph tools. Events share the event loop thread,
+    so samples of events that overlap in time are counted for each of them.
+    """
+
+    def __init__(self, slow_ms: float, interval: float = 0.005, keep: int = 20):
+        self.slow_ms = slow_ms
+        self.interval = interval
+        self.enabled = False
+        self.captures: collections.deque[tuple[str, float, collections.Counter]] = (
+            collections.deque(maxlen=keep)
+        )
+        self._active: dict[int, tuple[int, collections.Counter]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def begin(self) -> int | None:
+        """Start sampling the calling thread; returns a token for ``end``."""
+        if not self.enabled:
+            return None
+        samples = collections.Counter()
+        token = id(samples)
+        with self._lock:
+            self._active[token] = (threading.get_ident(), samples)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="retail-profiler", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+        return token
+
+    def end(self, token: int | None, label: str, elapsed: float):
+        """Stop sampling and keep the samples if the event was slow."""
+        if token is None:
+            return
+        with self._lock:
+            _, samples = self._active.pop(token)
+            if not self._active:
+                self._wake.clear()
+        if elapsed * 1000 >= self.slow_ms and samples:
+            self.captures.append((label, elapsed, samples))
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.values():
+                    if (frame := frames.get(ident)) is not None:
+                        samples[_fold(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def render(self) -> str:
+        """The kept captures as folded stacks, slowest event first."""
+        lines = []
+        for label, elapsed, samples in sorted(self.captures, key=lambda c: -c[1]):
+            lines.append(f"# {label} {elapsed * 1000:.1f} ms")
+            lines += [f"{stack} {n}" for stack, n in samples.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_qualname} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+@functools.cache
+def get_profiler() -> SamplingProfiler:
+    """Return the profiler, enabled when ``RETAIL_PROFILE_SLOW_MS`` is set."""
+    slow_ms = os.environ.get("RETAIL_PROFILE_SLOW_MS")
+    profiler = SamplingProfiler(float(slow_ms or 250))
+    profiler.enabled = slow_ms is not None
+    return profiler
+
+
+# Every this many events, the middleware also pickles the handling state
+# to sample serialization cost; the state manager does not expose it.
+SERIALIZE_SAMPLE_EVERY = 64
+
+
+@dataclasses.dataclass
+class _EventTiming:
+    handler: str
+    start: float
+    computed: float = 0.0
+    profile: int | None = None
+
+
+# Timing of the event being processed, set by the middleware. Handlers and
+# computed vars run in the task that processes their event, so they see it.
+_event_timing: contextvars.ContextVar[_EventTiming | None] = contextvars.ContextVar(
+    "event_timing", default=None
+)
+
+
+def handler_name(event_name: str) -> str:
+    """The handler part of a fully qualified event name."""
+    return event_name.rpartition(".")[2]
+
+
+@contextlib.contextmanager
+def computed_var_timer(var: str) -> Iterator[None]:
+    """Time a computed var body and charge it to the current event."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        get_metrics().observe("retail_computed_var_seconds", elapsed, var=var)
+        if (timing := _event_timing.get()) is not None:
+            timing.computed += elapsed
+
+
+class MetricsMiddleware(Middleware):
+    """Times events by stage and measures the updates sent back.
+
+    Reflex builds the delta inside the event, so handler time is the event
+    time less the computed var recomputation charged to it. Background
+    handlers are neither timed nor profiled: they can run for as long as
+    their session, like the KPI watcher.
+    """
+
+    def __init__(self):
+        self._events = itertools.count(1)
+
+    async def preprocess(self, app, state, event):
+        if state._get_event_handler(event)[1].is_background:
+            _event_timing.set(None)
+            return
+        _event_timing.set(
+            _EventTiming(
+                handler_name(event.name),
+                time.perf_counter(),
+                0.0,
+                get_profiler().begin(),
+            )
+        )
+
+    async def postprocess(self, app, state, event, update):
+        timing = _event_timing.get()
+        if timing is None:
+            return update
+        metrics = get_metrics()
+        encode_start = time.perf_counter()
+        size = len(update.json())
+        metrics.observe(
+            "retail_delta_encode_seconds",
+            time.perf_counter() - encode_start,
+            handler=timing.handler,
+        )
+        metrics.observe("retail_delta_bytes", size, handler=timing.handler)
+        if update.final is False:
+            return update
+        elapsed = encode_start - timing.start
+        metrics.observe("retail_event_seconds", elapsed, handler=timing.handler)
+        metrics.observe(
+            "retail_handler_seconds", elapsed - timing.computed, handler=timing.handler
+        )
+        get_profiler().end(timing.profile, timing.handler, elapsed)
+        _event_timing.set(None)
+        if next(self._events) % SERIALIZE_SAMPLE_EVERY == 0:
+            substate = state._get_event_handler(event)[0]
+            with metrics.timer("retail_serialize_seconds"):
+                payload = substate._serialize()
+            metrics.observe("retail_state_bytes", len(payload))
+        return update
+
+
+def metrics(request: Request):
+    """Serve the metrics registry in Prometheus text format."""
+    return PlainTextResponse(
+        get_metrics().render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def profile(request: Request):
+    """Show captured slow-event stacks, or switch the profiler with POST.
+
+    ``POST /profile?enabled=1&slow_ms=200`` turns sampling on with a new
+    threshold, ``enabled=0`` turns it off. GET returns folded stacks.
+    """
+    profiler = get_profiler()
+    if request.method == "POST":
+        params = request.query_params
+        if slow_ms := params.get("slow_ms"):
+            try:
+                threshold = float(slow_ms)
+            except ValueError:
+                threshold = float("nan")
+            if not threshold >= 0:
+                return PlainTextResponse(f"Invalid slow_ms: {slow_ms}", status_code=400)
+            profiler.slow_ms = threshold
+        profiler.enabled = params.get("enabled", "1") not in ("0", "false")
+        return PlainTextResponse(
+            f"enabled={profiler.enabled} slow_ms={profiler.slow_ms}\n"
+        )
+    return PlainTextResponse(profiler.render())
+
+
+metrics_api = Starlette(
+    routes=[
+        Route("/metrics", metrics),
+        Route("/profile", profile, methods=["GET", "POST"]),
+    ]
+)
@@ -0,0 +1,102 @@
+"""Partitioned aggregation on a process pool over shared-memory columns."""
+
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+
+import numpy as np
+
+# Slices smaller than this are aggregated in-process; below it the cost of
+# dispatching to workers outweighs the parallel speedup.
+PARALLEL_MIN_ROWS = 2_000_000
+# Rows per partition. Partitions are contiguous row ranges of the
+# date-sorted columns, i.e. spans of days.
+PARTITION_ROWS = 500_000
+
+# Column maps this worker holds, keyed by file path.
+_attached: dict[str, np.ndarray] = {}
+
+
+def worker_count() -> int:
+    """Worker processes to aggregate with, from ``RETAIL_AGGREGATE_WORKERS``.
+
+    Unset, 0 or 1 keeps aggregation in-process, and the synthetic store in
+    private memory rather than shared memory. Every web worker starts a pool
+    of its own, so size it as the host's cores divided by the web workers.
+    """
+    return int(os.environ.get("RETAIL_AGGREGATE_WORKERS", "1"))
+
+
+@functools.cache
+def get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Return the aggregation worker pool, started on first use.
+
+    Workers are spawned rather than forked, so they never inherit the
+    server's threads or event loop.
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=worker_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _attach(columns: dict[str, tuple[str, str, int]]) -> dict[str, np.ndarray]:
+    for path in _attached.keys() - {spec[0] for spec in columns.values()}:
+        del _attached[path]
+    arrays = {}
+    for name, (path, dtype, capacity) in columns.items():
+        if path not in _attached:
+            _attached[path] = np.memmap(
+                path, dtype=dtype, mode="r", shape=(max(capacity, 1),)
+            ).view(np.ndarray)
+        arrays[name] = _attached[path]
+    return arrays
+
+
+def _partition_sums(
+    columns: dict[str, tuple[str, str, int]],
+    lo: int,
+    hi: int,
+    segments: np.ndarray | None,
+    n_products: int,
+) -> np.ndarray:
+    """Worker task: the partial sums of rows ``[lo, hi)``."""
+    from app.engine import partial_sums
+
+    arrays = _attach(columns)
+    rows = slice(lo, hi)
+    return partial_sums(
+        arrays["product_id"][rows],
+        arrays["segment"][rows],
+        arrays["units"][rows],
+        arrays["revenue"][rows],
+        segments,
+        n_products,
+    )
+
+
+def parallel_sums(
+    columns: dict[str, tuple[str, str, int]],
+    rows: slice,
+    segments: np.ndarray | None,
+    n_products: int,
+) -> np.ndarray:
+    """Partial sums of ``rows``, computed per partition and merged.
+
+    Only paths and row bounds cross the process boundary; workers map the
+    column files themselves and return one small array per partition.
+    """
+    bounds = range(rows.start, rows.stop, PARTITION_ROWS)
+    futures = [
+        get_pool().submit(
+            _partition_sums,
+            columns,
+            lo,
+            min(lo + PARTITION_ROWS, rows.stop),
+            segments,
+            n_products,
+        )
+        for lo in bounds
+    ]
+    return sum(future.result() for future in futures)
@@ -0,0 +1,241 @@
+"""Pre-aggregated daily, weekly and monthly rollup cubes per (store, category)."""
+
+import functools
+
+import numpy as np
+
+from app.store import SalesStore, from_day, get_store
+
+GRANULARITIES = ("Daily", "Weekly", "Monthly")
+
+# 1970-01-01 was a Thursday, so ISO weeks (Monday-based) start three days
+# before the epoch.
+_WEEK_OFFSET = 3
+
+
+def period_of(day: np.ndarray | int, granularity: str) -> np.ndarray | int:
+    """Map day numbers to period numbers for ``granularity``."""
+    if granularity == "Daily":
+        return day
+    if granularity == "Weekly":
+        return (day + _WEEK_OFFSET) // 7
+    return (
+        np.asarray(day).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    )
+
+
+def period_start(period: int, granularity: str) -> int:
+    """First day number of ``period``."""
+    if granularity == "Daily":
+        return period
+    if granularity == "Weekly":
+        return period * 7 - _WEEK_OFFSET
+    return int(np.datetime64(period, "M").astype("datetime64[D]").astype(np.int64))
+
+
+def period_label(period: int, granularity: str, long: bool = False) -> str:
+    """Axis label for ``period``; ``long`` adds the year."""
+    start = from_day(period_start(period, granularity))
+    if granularity == "Daily":
+        return start.strftime("%b %d %Y" if long else "%b %d")
+    if granularity == "Weekly":
+        year, week, _ = start.isocalendar()
+        return f"W{week:02d} {year}" if long else f"W{week:02d}"
+    return start.strftime("%b %Y" if long else "%b")
+
+
+class _Cube:
+    """Revenue and transaction counts per (period, store, category)."""
+
+    def __init__(self, granularity: str, n_segments: int):
+        self.granularity = granularity
+        self.first = 0
+        self.revenue = np.zeros((0, n_segments))
+        self.count = np.zeros((0, n_segments), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.revenue)
+
+    def _ensure(self, lo: int, hi: int):
+        """Grow the period axis so periods ``[lo, hi]`` are addressable."""
+        if not len(self):
+            self.first = lo
+        n_segments = self.revenue.shape[1]
+        if lo < self.first:
+            pad = self.first - lo
+            self.revenue = np.vstack([np.zeros((pad, n_segments)), self.revenue])
+            self.count = np.vstack(
+                [np.zeros((pad, n_segments), dtype=np.int64), self.count]
+            )
+            self.first = lo
+        if hi - self.first + 1 > len(self):
+            pad = hi - self.first + 1 - len(self)
+            self.revenue = np.vstack([self.revenue, np.zeros((pad, n_segments))])
+            self.count = np.vstack(
+                [self.count, np.zeros((pad, n_segments), dtype=np.int64)]
+            )
+
+    def add(self, period: np.ndarray, segment: np.ndarray, revenue: np.ndarray):
+        """Fold a batch of rows into the cube."""
+        if not len(period):
+            return
+        lo, hi = int(period.min()), int(period.max())
+        self._ensure(lo, hi)
+        n_segments = self.revenue.shape[1]
+        key = (period - lo) * n_segments + segment
+        size = (hi - lo + 1) * n_segments
+        rows = slice(lo - self.first, hi - self.first + 1)
+        self.revenue[rows] += np.bincount(key, weights=revenue, minlength=size).reshape(
+            -1, n_segments
+        )
+        self.count[rows] += np.bincount(key, minlength=size).reshape(-1, n_segments)
+
+
+class RollupCubes:
+    """Daily, ISO-weekly and monthly cubes built from a sales store.
+
+    Each cube holds partial aggregates per (period, segment), where a segment
+    is a (store, category) pair as encoded by ``SalesStore.segment``. A chart
+    series is a slice over the period axis and a weighted sum over the
+    selected segments. Range totals come from running sums over the daily
+    cube, so they cost O(segments) whatever the range length.
+    """
+
+    def __init__(self, n_stores: int, n_categories: int):
+        self.n_stores = n_stores
+        self.n_categories = n_categories
+        self.cubes = {
+            granularity: _Cube(granularity, n_stores * n_categories)
+            for granularity in GRANULARITIES
+        }
+        # Bumped by every append, so running sums built from an older cube
+        # are never kept.
+        self.version = 0
+        self._prefix: tuple[int, np.ndarray, np.ndarray] | None = None
+
+    @classmethod
+    def from_store(cls, store: SalesStore) -> "RollupCubes":
+        cubes = cls(len(store.store_names), len(store.category_names))
+        cubes.append(store.date, store.segment, store.revenue)
+        return cubes
+
+    def append(self, day: np.ndarray, segment: np.ndarray, revenue: np.ndarray):
+        """Fold newly ingested rows into every cube in O(batch)."""
+        day = day.astype(np.int64)
+        segment = segment.astype(np.int64)
+        for granularity, cube in self.cubes.items():
+            cube.add(period_of(day, granularity), segment, revenue)
+        self.version += 1
+
+    @property
+    def first_day(self) -> int:
+        return self.cubes["Daily"].first
+
+    @property
+    def last_day(self) -> int:
+        return self.cubes["Daily"].first + len(self.cubes["Daily"]) - 1
+
+    def day_range(
+        self, start_day: int | None = None, end_day: int | None = None
+    ) -> tuple[int, int]:
+        """``[start_day, end_day]`` clamped to the days with data; None is open."""
+        start = self.first_day if start_day is None else max(start_day, self.first_day)
+        end = self.last_day if end_day is None else min(end_day, self.last_day)
+        return start, end
+
+    def prefix_sums(self) -> tuple[np.ndarray, np.ndarray]:
+        """Running revenue and count per segment over the daily cube.
+
+        Row ``i`` sums the days before ``first_day + i``, so the totals of a
+        day range are the difference of two rows. Rebuilt on first use after
+        a batch changes the cube, and only cached if no batch arrived while
+        they were built.
+        """
+        version = self.version
+        if (prefix := self._prefix) is not None and prefix[0] == version:
+            return prefix[1], prefix[2]
+        daily = self.cubes["Daily"]
+        n_segments = daily.revenue.shape[1]
+        revenue = np.zeros((len(daily) + 1, n_segments))
+        count = np.zeros((len(daily) + 1, n_segments), dtype=np.int64)
+        np.cumsum(daily.revenue, axis=0, out=revenue[1:])
+        np.cumsum(daily.count, axis=0, out=count[1:])
+        if self.version == version:
+            self._prefix = version, revenue, count
+        return revenue, count
+
+    def totals(
+        self, start_day: int, end_day: int, segments: np.ndarray | None = None
+    ) -> tuple[float, int]:
+        """Revenue and transaction count over ``[start_day, end_day]``.
+
+        ``segments`` selects segments as in ``series``; None sums all of them.
+        """
+        daily = self.cubes["Daily"]
+        lo = max(start_day, daily.first) - daily.first
+        hi = min(end_day, self.last_day) - daily.first + 1
+        if lo >= hi:
+            return 0.0, 0
+        revenue, count = self.prefix_sums()
+        revenue, count = revenue[hi] - revenue[lo], count[hi] - count[lo]
+        if segments is not None:
+            revenue, count = revenue[segments], count[segments]
+        return float(revenue.sum()), int(count.sum())
+
+    def _segment_sum(
+        self, cube: _Cube, lo: int, hi: int, segments: np.ndarray | None
+    ) -> np.ndarray:
+        rows = cube.revenue[lo - cube.first : hi - cube.first + 1]
+        if segments is None:
+            return rows.sum(axis=1)
+        return rows @ segments.astype(np.float64)
+
+    def series(
+        self,
+        granularity: str,
+        segments: np.ndarray | None = None,
+        start_day: int | None = None,
+        end_day: int | None = None,
+    ) -> list[tuple[str, float]]:
+        """Revenue per period over ``[start_day, end_day]``.
+
+        ``segments`` is a boolean selection over segment codes, as returned
+        by ``SalesStore.segment_selection``, or None for all segments. Periods
+        cut by the range edges are completed from the daily cube, so coarse
+        buckets never include days outside the range.
+        """
+        daily = self.cubes["Daily"]
+        if not len(daily):
+            return []
+        start, end = self.day_range(start_day, end_day)
+        if start > end:
+            return []
+        cube = self.cubes[granularity]
+        first = int(period_of(start, granularity))
+        last = int(period_of(end, granularity))
+        values = self._segment_sum(cube, first, last, segments)
+        if granularity != "Daily":
+            first_end = period_start(first + 1, granularity) - 1
+            if period_start(first, granularity) < start or first_end > end:
+                values[0] = self._segment_sum(
+                    daily, start, min(first_end, end), segments
+                ).sum()
+            if last > first and period_start(last + 1, granularity) - 1 > end:
+                values[-1] = self._segment_sum(
+                    daily, period_start(last, granularity), end, segments
+                ).sum()
+        long = from_day(start).year != from_day(end).year
+        return [
+            (period_label(first + i, granularity, long), value)
+            for i, value in enumerate(values.tolist())
+        ]
+
+
+@functools.cache
+def get_rollups() -> RollupCubes:
+    """Return the cubes for the shared sales store."""
+    from app.snapshot import get_snapshot
+
+    if (snapshot := get_snapshot()) is not None:
+        return snapshot.rollups
+    return RollupCubes.from_store(get_store())
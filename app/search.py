@@ -0,0 +1,139 @@
+"""N-gram search index over product names."""
+
+import collections
+import functools
+import threading
+
+import numpy as np
+
+from app.store import get_store
+
+
+def trigrams(text: str) -> set[str]:
+    """The distinct three-character substrings of ``text``."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def short_grams(text: str) -> set[str]:
+    """The distinct one- to three-character substrings of ``text``."""
+    return {text[i : i + n] for n in (1, 2, 3) for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """Case-insensitive substring search backed by an n-gram inverted index.
+
+    Names are lowercased once at build time. Every substring of up to three
+    characters has a posting list, so the first keystrokes of a query are a
+    single lookup. A longer query intersects the posting lists of its
+    trigrams, smallest first, and only verifies the surviving candidates.
+    Recent results are kept, so a query that extends an earlier one only
+    re-checks the earlier matches. Ids are stored as int32 to halve the
+    posting lists.
+    """
+
+    def __init__(self, names: tuple[str, ...], cache_size: int = 256):
+        self.names = [name.lower() for name in names]
+        postings: dict[str, list[int]] = collections.defaultdict(list)
+        for product_id, name in enumerate(self.names):
+            for gram in short_grams(name):
+                postings[gram].append(product_id)
+        self.postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        self.cache_size = cache_size
+        self._recent: collections.OrderedDict[str, np.ndarray] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def _verify(self, query: str, candidates: np.ndarray) -> np.ndarray:
+        names = self.names
+        return np.array(
+            [i for i in candidates.tolist() if query in names[i]], dtype=np.int32
+        )
+
+    def _lookup(self, query: str) -> np.ndarray:
+        if len(query) <= 3:
+            # A posting list of a short query is already the exact answer.
+            return self.postings.get(query, np.empty(0, np.int32))
+        # Reuse the longest cached prefix of the query: typing extends the
+        # previous query, and its matches are a superset of the new ones.
+        with self._lock:
+            previous = next(
+                (
+                    self._recent[query[:end]]
+                    for end in range(len(query) - 1, 3, -1)
+                    if query[:end] in self._recent
+                ),
+                None,
+            )
+        postings = sorted(
+            (
+                self.postings.get(gram, np.empty(0, np.int32))
+                for gram in trigrams(query)
+            ),
+            key=len,
+        )
+        if previous is not None:
+            postings.insert(0, previous)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates) or not len(posting):
+                # A trigram no name contains leaves no candidates.
+                candidates = candidates[:0]
+                break
+            # Probe the larger list by binary search: O(c log p) for c
+            # candidates instead of merging both lists.
+            found = np.searchsorted(posting, candidates).clip(max=len(posting) - 1)
+            candidates = candidates[posting[found] == candidates]
+        return self._verify(query, candidates)
+
+    def search(self, query: str) -> np.ndarray:
+        """Sorted ids of the names containing ``query``, ignoring case."""
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.names))
+        with self._lock:
+            if query in self._recent:
+                self._recent.move_to_end(query)
+                return self._recent[query]
+        result = self._lookup(query)
+        with self._lock:
+            self._recent[query] = result
+            if len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+        return result
+
+    def fuzzy(self, query: str, limit: int = 10, min_score: float = 0.5) -> np.ndarray:
+        """Ids of up to ``limit`` names sharing the most trigrams with ``query``.
+
+        Scores are the fraction of the query's trigrams found in a name;
+        names scoring below ``min_score`` are dropped.
+        """
+        grams = trigrams(query.lower())
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        keep = counts / len(grams) >= min_score
+        ids, counts = ids[keep], counts[keep]
+        order = np.lexsort((ids, -counts))[:limit]
+        return ids[order]
+
+    def matching(self, query: str) -> np.ndarray:
+        """Sorted ids of the names containing ``query``, else its fuzzy matches.
+
+        The product table and the export both select products this way.
+        """
+        matches = self.search(query)
+        if not len(matches):
+            matches = np.sort(self.fuzzy(query))
+        return matches
+
+
+@functools.cache
+def get_search_index() -> SearchIndex:
+    """Return the search index for the shared product catalog."""
+    return SearchIndex(get_store().product_names)
@@ -0,0 +1,224 @@
+"""Mergeable per-day top-product summaries for approximate product tables."""
+
+import functools
+
+import numpy as np
+
+from app.store import SalesStore, get_store
+
+# Product counters kept per (day, segment) cell.
+SKETCH_CAPACITY = 32
+# Date slices with at least this many rows are previewed from the summaries
+# while their exact totals are computed.
+APPROXIMATE_MIN_ROWS = 1_000_000
+
+
+def _summarize(
+    cell: np.ndarray,
+    product_id: np.ndarray,
+    units: np.ndarray,
+    revenue: np.ndarray,
+    n_products: int,
+    capacity: int,
+) -> tuple[np.ndarray, ...]:
+    """Per-cell top-``capacity`` products by revenue of a set of rows.
+
+    Returns the distinct cells, their product ids (-1 in unused slots),
+    units and revenue as ``(cells, capacity)`` arrays, and the revenue of
+    the products each cell dropped.
+    """
+    keys, inverse = np.unique(
+        cell.astype(np.int64) * n_products + product_id, return_inverse=True
+    )
+    key_units = np.bincount(inverse, weights=units, minlength=len(keys))
+    key_revenue = np.bincount(inverse, weights=revenue, minlength=len(keys))
+    key_cell, key_product = np.divmod(keys, n_products)
+    order = np.lexsort((-key_revenue, key_cell))
+    key_cell = key_cell[order]
+    cells, starts = np.unique(key_cell, return_index=True)
+    row = np.repeat(np.arange(len(cells)), np.diff(np.append(starts, len(key_cell))))
+    slot = np.arange(len(key_cell)) - starts[row]
+    kept = slot < capacity
+    ids = np.full((len(cells), capacity), -1, dtype=np.int32)
+    kept_units = np.zeros((len(cells), capacity), dtype=np.int64)
+    kept_revenue = np.zeros((len(cells), capacity))
+    at = row[kept], slot[kept]
+    ids[at] = key_product[order][kept]
+    kept_units[at] = key_units[order][kept]
+    kept_revenue[at] = key_revenue[order][kept]
+    dropped = np.bincount(
+        row[~kept], weights=key_revenue[order][~kept], minlength=len(cells)
+    )
+    return cells, ids, kept_units, kept_revenue, dropped
+
+
+class ProductSketches:
+    """Top products by revenue per (day, store, category) cell.
+
+    Each cell keeps the ``capacity`` products with the most revenue that day,
+    their units and revenue, and the revenue of the products it dropped.
+    Cells are mergeable summaries: adding the counters of any set of cells
+    gives a lower bound on every product's totals, and their dropped revenue
+    bounds the error. With no more products than the capacity they are
+    exact.
+
+    The cell arrays are views of the used days of buffers that grow
+    geometrically, so batches for new days rarely copy them.
+    """
+
+    def __init__(
+        self, n_segments: int, n_products: int, capacity: int = SKETCH_CAPACITY
+    ):
+        self.n_products = n_products
+        self.capacity = min(capacity, n_products)
+        self.first = 0
+        self._set_buffers(
+            np.full((0, n_segments, self.capacity), -1, dtype=np.int32),
+            np.zeros((0, n_segments, self.capacity), dtype=np.int64),
+            np.zeros((0, n_segments, self.capacity)),
+            np.zeros((0, n_segments)),
+            0,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        first: int,
+        product_id: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+        dropped: np.ndarray,
+        n_products: int,
+    ) -> "ProductSketches":
+        """Sketches over existing cell arrays, such as a snapshot's."""
+        sketches = cls(dropped.shape[1], n_products, product_id.shape[2])
+        sketches.first = first
+        sketches._set_buffers(product_id, units, revenue, dropped, len(dropped))
+        return sketches
+
+    @classmethod
+    def from_store(cls, store: SalesStore) -> "ProductSketches":
+        sketches = cls(
+            len(store.store_names) * len(store.category_names), store.n_products
+        )
+        sketches.append(
+            store.date, store.segment, store.product_id, store.units, store.revenue
+        )
+        return sketches
+
+    def copy(self) -> "ProductSketches":
+        """An independent copy of the used days' cells."""
+        return ProductSketches.from_arrays(
+            self.first,
+            self.product_id.copy(),
+            self.units.copy(),
+            self.revenue.copy(),
+            self.dropped.copy(),
+            self.n_products,
+        )
+
+    def __len__(self) -> int:
+        return len(self.product_id)
+
+    def _set_buffers(
+        self,
+        product_id: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+        dropped: np.ndarray,
+        days: int,
+    ):
+        self._buffers = product_id, units, revenue, dropped
+        self.product_id = product_id[:days]
+        self.units = units[:days]
+        self.revenue = revenue[:days]
+        self.dropped = dropped[:days]
+
+    def _ensure(self, lo: int, hi: int):
+        """Grow the day axis so days ``[lo, hi]`` are addressable."""
+        if not len(self):
+            self.first = lo
+        before = max(self.first - lo, 0)
+        after = max(hi - self.first + 1 - len(self), 0)
+        if not (before or after):
+            return
+        days = before + len(self) + after
+        buffers = self._buffers
+        if before or days > len(buffers[0]):
+            size = days if before else max(days, 2 * len(buffers[0]))
+            grown = []
+            for buffer, fill in zip(buffers, (-1, 0, 0, 0)):
+                copy = np.full((size, *buffer.shape[1:]), fill, dtype=buffer.dtype)
+                copy[before : before + len(self)] = buffer[: len(self)]
+                grown.append(copy)
+            buffers = grown
+            self.first -= before
+        self._set_buffers(*buffers, days)
+
+    def append(
+        self,
+        day: np.ndarray,
+        segment: np.ndarray,
+        product_id: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+    ):
+        """Merge a batch of rows into the cells it touches in O(batch)."""
+        if not len(day):
+            return
+        self._ensure(int(day.min()), int(day.max()))
+        n_segments = self.dropped.shape[1]
+        cell = (day.astype(np.int64) - self.first) * n_segments + segment
+        touched = np.unique(cell)
+        ids = self.product_id.reshape(-1, self.capacity)
+        all_units = self.units.reshape(-1, self.capacity)
+        all_revenue = self.revenue.reshape(-1, self.capacity)
+        dropped = self.dropped.reshape(-1)
+        held = ids[touched] >= 0
+        cells, new_ids, new_units, new_revenue, new_dropped = _summarize(
+            np.concatenate([np.repeat(touched, self.capacity)[held.ravel()], cell]),
+            np.concatenate([ids[touched][held], product_id]),
+            np.concatenate([all_units[touched][held], units]),
+            np.concatenate([all_revenue[touched][held], revenue]),
+            self.n_products,
+            self.capacity,
+        )
+        ids[cells] = new_ids
+        all_units[cells] = new_units
+        all_revenue[cells] = new_revenue
+        dropped[cells] += new_dropped
+
+    def totals(
+        self,
+        start_day: int | None,
+        end_day: int | None,
+        segments: np.ndarray | None,
+    ) -> tuple[np.ndarray, np.ndarray, float]:
+        """Estimated units and revenue per product over a day range.
+
+        ``segments`` selects segments as in ``RollupCubes.series``; None
+        days leave that side open. Also returns the bound on how much
+        revenue any one product may be missing.
+        """
+        lo = 0 if start_day is None else max(start_day - self.first, 0)
+        hi = len(self) if end_day is None else min(end_day - self.first + 1, len(self))
+        rows = slice(lo, max(lo, hi))
+        cells = (rows,) if segments is None else (rows, segments)
+        ids, dropped = self.product_id[cells], self.dropped[cells]
+        units, revenue = self.units[cells], self.revenue[cells]
+        held = ids >= 0
+        return (
+            np.bincount(ids[held], weights=units[held], minlength=self.n_products),
+            np.bincount(ids[held], weights=revenue[held], minlength=self.n_products),
+            float(dropped.sum()),
+        )
+
+
+@functools.cache
+def get_product_sketches() -> ProductSketches:
+    """Return the summaries for the shared sales store."""
+    from app.snapshot import get_snapshot
+
+    if (snapshot := get_snapshot()) is not None:
+        return snapshot.sketches
+    return ProductSketches.from_store(get_store())
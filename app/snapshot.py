@@ -0,0 +1,273 @@
+"""Memory-mapped on-disk snapshots of the sales store and its rollups.
+
+A snapshot is a directory of fixed-width little-endian column files plus a
+``manifest.json`` holding their types, the row count and the store,
+category and product name dictionaries. The ``CURRENT`` file in the
+snapshot root names the latest complete snapshot. Writers build a new
+directory, then replace ``CURRENT``, so readers never see a partial one.
+
+Workers map the files copy-on-write: every worker on a host shares one
+page-cached copy, and loading costs a few page faults instead of a parse.
+Workers that do not ingest follow ``CURRENT`` and switch to newer snapshots
+as the ingesting worker writes them.
+
+Run ``python -m app.snapshot DIR`` to write a snapshot of the configured
+store from the command line.
+"""
+
+import dataclasses
+import datetime
+import functools
+import json
+import os
+import pathlib
+import shutil
+import sys
+
+import numpy as np
+
+from app.parallel import worker_count
+from app.rollups import GRANULARITIES, RollupCubes, get_rollups
+from app.sketch import ProductSketches, get_product_sketches
+from app.store import COLUMNS, SalesStore, get_store
+
+FORMAT_VERSION = 2
+# Cell arrays of the product sketches, written one file each.
+SKETCH_ARRAYS = ("product_id", "units", "revenue", "dropped")
+# Complete snapshots kept besides the current one, for workers that are
+# still starting from them.
+KEEP_PREVIOUS = 1
+
+
+@dataclasses.dataclass
+class Snapshot:
+    """Structures loaded from a snapshot."""
+
+    store: SalesStore
+    rollups: RollupCubes
+    product_units: np.ndarray
+    product_revenue: np.ndarray
+    sketches: ProductSketches
+    name: str = ""
+
+
+def _write_array(path: pathlib.Path, values: np.ndarray) -> str:
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    with path.open("wb") as f:
+        f.write(values.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    return values.dtype.str
+
+
+def write_snapshot(
+    root: pathlib.Path,
+    store: SalesStore,
+    rollups: RollupCubes,
+    product_units: np.ndarray,
+    product_revenue: np.ndarray,
+    sketches: ProductSketches,
+) -> pathlib.Path:
+    """Write a snapshot under ``root`` and make it the current one.
+
+    The arguments must not change while this runs; the ingestion side
+    passes views taken on the event loop and copies of the rollup and
+    sketch arrays.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    name = datetime.datetime.now(datetime.UTC).strftime("snapshot-%Y%m%dT%H%M%S%fZ")
+    partial = root / f".{name}.partial"
+    partial.mkdir()
+    n_rows = len(store)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "rows": n_rows,
+        "store_names": list(store.store_names),
+        "category_names": list(store.category_names),
+        "product_names": list(store.product_names),
+        "columns": {
+            column: _write_array(partial / f"{column}.bin", getattr(store, column))
+            for column in (*COLUMNS, "segment")
+        },
+        "rollups": {},
+        "products": {
+            "units": _write_array(partial / "product_units.bin", product_units),
+            "revenue": _write_array(partial / "product_revenue.bin", product_revenue),
+        },
+        "sketches": {
+            "first": sketches.first,
+            "days": len(sketches),
+            "capacity": sketches.capacity,
+            **{
+                name: _write_array(
+                    partial / f"sketch-{name}.bin", getattr(sketches, name)
+                )
+                for name in SKETCH_ARRAYS
+            },
+        },
+    }
+    for granularity, cube in rollups.cubes.items():
+        manifest["rollups"][granularity] = {
+            "first": cube.first,
+            "periods": len(cube),
+            "revenue": _write_array(
+                partial / f"rollup-{granularity}-revenue.bin", cube.revenue
+            ),
+            "count": _write_array(
+                partial / f"rollup-{granularity}-count.bin", cube.count
+            ),
+        }
+    with (partial / "manifest.json").open("w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    final = root / name
+    partial.rename(final)
+    pointer = root / ".CURRENT.partial"
+    pointer.write_text(name)
+    os.replace(pointer, root / "CURRENT")
+    _prune(root, name)
+    return final
+
+
+def _prune(root: pathlib.Path, current: str):
+    snapshots = sorted(p for p in root.glob("snapshot-*") if p.name != current)
+    for stale in snapshots[: max(0, len(snapshots) - KEEP_PREVIOUS)]:
+        # Workers mapping a removed snapshot keep their pages until exit.
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def _map(path: pathlib.Path, dtype: str, shape: tuple[int, ...]) -> np.ndarray:
+    if not np.prod(shape):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="c", shape=shape).view(np.ndarray)
+
+
+def load_snapshot(root: pathlib.Path) -> Snapshot | None:
+    """Map the current snapshot under ``root``, or None if there is none."""
+    if (name := current_name(root)) is None:
+        return None
+    directory = root / name
+    try:
+        manifest = json.loads((directory / "manifest.json").read_text())
+    except FileNotFoundError:
+        return None
+    if manifest["format"] != FORMAT_VERSION:
+        return None
+    n_rows = manifest["rows"]
+    columns = {
+        column: _map(directory / f"{column}.bin", dtype, (n_rows,))
+        for column, dtype in manifest["columns"].items()
+    }
+    store = SalesStore.from_buffers(
+        columns,
+        tuple(manifest["store_names"]),
+        tuple(manifest["category_names"]),
+        tuple(manifest["product_names"]),
+        # Aggregation workers map the column files directly.
+        paths={column: str(directory / f"{column}.bin") for column in columns}
+        if worker_count() > 1 and n_rows
+        else None,
+    )
+    rollups = RollupCubes(len(store.store_names), len(store.category_names))
+    n_segments = rollups.n_stores * rollups.n_categories
+    for granularity in GRANULARITIES:
+        entry = manifest["rollups"][granularity]
+        cube = rollups.cubes[granularity]
+        shape = (entry["periods"], n_segments)
+        cube.first = entry["first"]
+        cube.revenue = _map(
+            directory / f"rollup-{granularity}-revenue.bin", entry["revenue"], shape
+        )
+        cube.count = _map(
+            directory / f"rollup-{granularity}-count.bin", entry["count"], shape
+        )
+    n_products = len(store.product_names)
+    products = manifest["products"]
+    entry = manifest["sketches"]
+    cells = (entry["days"], n_segments)
+    sketch = {
+        name: _map(
+            directory / f"sketch-{name}.bin",
+            entry[name],
+            cells if name == "dropped" else (*cells, entry["capacity"]),
+        )
+        for name in SKETCH_ARRAYS
+    }
+    return Snapshot(
+        store,
+        rollups,
+        _map(directory / "product_units.bin", products["units"], (n_products,)),
+        _map(directory / "product_revenue.bin", products["revenue"], (n_products,)),
+        ProductSketches.from_arrays(entry["first"], **sketch, n_products=n_products),
+        directory.name,
+    )
+
+
+def current_name(root: pathlib.Path) -> str | None:
+    """The name of the current snapshot under ``root``, if there is one."""
+    try:
+        return (root / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+# A newer snapshot switched to since startup, served in place of the first.
+_installed: Snapshot | None = None
+
+
+@functools.cache
+def get_snapshot() -> Snapshot | None:
+    """Return the snapshot under ``RETAIL_SNAPSHOT_DIR``, if one is set and exists."""
+    if _installed is not None:
+        return _installed
+    if root := os.environ.get("RETAIL_SNAPSHOT_DIR"):
+        return load_snapshot(pathlib.Path(root))
+    return None
+
+
+def install_snapshot(snapshot: Snapshot):
+    """Serve ``snapshot`` in place of the current one.
+
+    The shared structures read from snapshots are rebuilt from it on their
+    next use. Call on the event loop, between events.
+    """
+    from app.search import get_search_index
+    from app.topk import get_topk_index
+
+    global _installed
+    renamed = snapshot.store.product_names != get_store().product_names
+    _installed = snapshot
+    for getter in (
+        get_snapshot,
+        get_store,
+        get_rollups,
+        get_topk_index,
+        get_product_sketches,
+    ):
+        getter.cache_clear()
+    if renamed:
+        get_search_index.cache_clear()
+
+
+def main(argv: list[str]) -> int:
+    from app.topk import get_topk_index
+
+    if len(argv) != 1:
+        print("usage: python -m app.snapshot DIR", file=sys.stderr)
+        return 2
+    index = get_topk_index()
+    path = write_snapshot(
+        pathlib.Path(argv[0]),
+        get_store(),
+        get_rollups(),
+        index.values["units_sold"],
+        index.values["total_revenue"],
+        get_product_sketches(),
+    )
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
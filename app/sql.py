@@ -0,0 +1,387 @@
+"""Optional SQLite/DuckDB data source with filters pushed down into SQL.
+
+The source reads a ``sales`` table with the ingestion columns::
+
+    date TEXT (ISO), store TEXT, category TEXT, product TEXT,
+    units INTEGER, revenue REAL
+
+Filters, the period group-by, product search and ranking all run in the
+database; Python only receives the grouped rows of one chart or one table
+page, or the KPI totals, fetched in batches and transposed into columns.
+Exports stream the matching facts in chunks.
+"""
+
+import contextlib
+import datetime
+import functools
+import os
+import queue
+import sqlite3
+from collections.abc import Iterator
+
+import numpy as np
+
+from app.engine import Filters, parse_day
+from app.rollups import period_label, period_of
+from app.store import from_day, to_day
+
+# Rows fetched per round trip when reading results.
+BATCH_ROWS = 1024
+# Covering index for the filtered scans: the leading store column serves
+# single-store views, and SQLite skip-scans it for all-store ones.
+INDEXES = (
+    (
+        "CREATE INDEX IF NOT EXISTS sales_store_date_category "
+        "ON sales (store, date, category, product, units, revenue)"
+    ),
+)
+# Sort keys of the product table and the result columns they order by.
+ORDER_COLUMNS = {
+    "name": "product",
+    "units_sold": "units_sold",
+    "total_revenue": "total_revenue",
+}
+# Expressions for the first day of the period containing ``date``.
+PERIOD_START = {
+    "sqlite": {
+        "Daily": "date",
+        "Weekly": "date(date, printf('-%d days', (strftime('%w', date) + 6) % 7))",
+        "Monthly": "substr(date, 1, 7) || '-01'",
+    },
+    "duckdb": {
+        "Daily": "CAST(CAST(date AS DATE) AS VARCHAR)",
+        "Weekly": "CAST(CAST(date_trunc('week', CAST(date AS DATE)) AS DATE) AS VARCHAR)",
+        "Monthly": "CAST(CAST(date_trunc('month', CAST(date AS DATE)) AS DATE) AS VARCHAR)",
+    },
+}
+
+
+def _where(
+    filters: Filters, start_day: int | None = None, end_day: int | None = None
+) -> tuple[str, list]:
+    """WHERE clause and parameters for a filter set.
+
+    Only the predicates in use are emitted, so the statement text depends on
+    which filters are set rather than their values, and each variant is
+    prepared once per connection.
+    """
+    clauses, params = [], []
+    if filters.store:
+        clauses.append("store = ?")
+        params.append(filters.store)
+    start = start_day if start_day is not None else parse_day(filters.start_date)
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(from_day(start).isoformat())
+    end = end_day if end_day is not None else parse_day(filters.end_date)
+    if end is not None:
+        clauses.append("date <= ?")
+        params.append(from_day(end).isoformat())
+    if filters.categories:
+        clauses.append(f"category IN ({', '.join('?' * len(filters.categories))})")
+        params.extend(filters.categories)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _columns(cursor, n_columns: int) -> list[list]:
+    """Drain ``cursor`` in batches into one list per result column."""
+    columns = [[] for _ in range(n_columns)]
+    while rows := cursor.fetchmany(BATCH_ROWS):
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+    return columns
+
+
+class SqlSource:
+    """Runs dashboard queries against a local SQLite or DuckDB file.
+
+    Connections come from a bounded pool shared by every session; a query
+    waits up to ``timeout`` seconds for a free connection rather than opening
+    another one.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self.dialect = "duckdb" if path.endswith((".duckdb", ".ddb")) else "sqlite"
+        if self.dialect == "sqlite":
+            self._create_indexes()
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        for connection in self._connect(pool_size):
+            self._pool.put(connection)
+        with self.connection() as connection:
+            first, last = connection.execute(
+                "SELECT min(date), max(date) FROM sales"
+            ).fetchone()
+            (products,) = _columns(
+                connection.execute("SELECT DISTINCT product FROM sales ORDER BY 1"), 1
+            )
+            (stores,) = _columns(
+                connection.execute("SELECT DISTINCT store FROM sales ORDER BY 1"), 1
+            )
+            (categories,) = _columns(
+                connection.execute("SELECT DISTINCT category FROM sales ORDER BY 1"),
+                1,
+            )
+        self.first_day = to_day(datetime.date.fromisoformat(str(first)[:10]))
+        self.last_day = to_day(datetime.date.fromisoformat(str(last)[:10]))
+        # Stable ids for the product table, by name order.
+        self.product_ids = {name: i + 1 for i, name in enumerate(products)}
+        self.store_names = tuple(stores)
+        self.category_names = tuple(categories)
+
+    def _create_indexes(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            for statement in INDEXES:
+                connection.execute(statement)
+            # Statistics let the planner skip-scan the store column.
+            if not connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone():
+                connection.execute("ANALYZE")
+            connection.commit()
+        except sqlite3.OperationalError:
+            # A read-only file; queries still work, only slower.
+            pass
+        finally:
+            connection.close()
+
+    def _connect(self, n: int) -> list:
+        if self.dialect == "duckdb":
+            import duckdb
+
+            database = duckdb.connect(self.path, read_only=True)
+            return [database.cursor() for _ in range(n)]
+        return [
+            sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+            for _ in range(n)
+        ]
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator:
+        """Borrow a pooled connection for the duration of the block."""
+        try:
+            connection = self._pool.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"no SQL connection free within {self.timeout:g} s"
+            ) from None
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def day_range(
+        self, start_day: int | None = None, end_day: int | None = None
+    ) -> tuple[int, int]:
+        """``[start_day, end_day]`` clamped to the days with data; None is open."""
+        start = self.first_day if start_day is None else max(start_day, self.first_day)
+        end = self.last_day if end_day is None else min(end_day, self.last_day)
+        return start, end
+
+    def series(
+        self, granularity: str, filters: Filters, start_day: int, end_day: int
+    ) -> list[tuple[str, float]]:
+        """Revenue per period over ``[start_day, end_day]``, grouped in SQL.
+
+        Periods without sales are filled with zeros, as in
+        ``RollupCubes.series``, so gaps keep their place on the axis.
+        """
+        where, params = _where(filters, start_day, end_day)
+        period = PERIOD_START[self.dialect][granularity]
+        with self.connection() as connection:
+            starts, totals = _columns(
+                connection.execute(
+                    f"SELECT {period} AS period, SUM(revenue) FROM sales {where} "
+                    "GROUP BY period ORDER BY period",
+                    params,
+                ),
+                2,
+            )
+        long = from_day(start_day).year != from_day(end_day).year
+        periods = period_of(
+            np.array(
+                [to_day(datetime.date.fromisoformat(s)) for s in starts], dtype=np.int64
+            ),
+            granularity,
+        )
+        first = int(period_of(start_day, granularity))
+        values = np.zeros(int(period_of(end_day, granularity)) - first + 1)
+        values[periods - first] = totals
+        return [
+            (period_label(first + i, granularity, long), value)
+            for i, value in enumerate(values.tolist())
+        ]
+
+    def totals(
+        self, filters: Filters, start_day: int, end_day: int
+    ) -> tuple[float, int]:
+        """Revenue and transaction count over ``[start_day, end_day]``.
+
+        Mirrors ``RollupCubes.totals`` for the stores and categories of
+        ``filters``; its dates are replaced by the given window.
+        """
+        where, params = _where(filters, start_day, end_day)
+        with self.connection() as connection:
+            revenue, count = connection.execute(
+                f"SELECT COALESCE(SUM(revenue), 0), COUNT(*) FROM sales {where}",
+                params,
+            ).fetchone()
+        return float(revenue), int(count)
+
+    def facts(
+        self, filters: Filters, query: str = "", chunk_rows: int = BATCH_ROWS
+    ) -> Iterator[dict[str, np.ndarray]]:
+        """Yield the matching sales rows as column chunks, in date order.
+
+        Chunks have the columns of ``export.iter_chunks``; ``query`` limits
+        the rows to the products the table matches for it. The stream reads
+        on a connection of its own, so a long download never holds one of
+        the pool's.
+        """
+        where, params = self._matching(filters, query)
+        (connection,) = self._connect(1)
+        try:
+            cursor = connection.execute(
+                "SELECT date, store, category, product, units, revenue "
+                f"FROM sales {where} ORDER BY date",
+                params,
+            )
+            while rows := cursor.fetchmany(chunk_rows):
+                dates, stores, categories, products, units, revenue = zip(*rows)
+                yield {
+                    "date": np.array(
+                        [str(date)[:10] for date in dates], dtype="datetime64[D]"
+                    ),
+                    "store": np.array(stores, dtype=object),
+                    "category": np.array(categories, dtype=object),
+                    "product": np.array(products, dtype=object),
+                    "units": np.array(units, dtype=np.int32),
+                    "revenue": np.array(revenue, dtype=np.float64),
+                }
+        finally:
+            connection.close()
+
+    def _matching(self, filters: Filters, query: str) -> tuple[str, list]:
+        """WHERE clause for the rows of the products a selection matches."""
+        where, params = _where(filters)
+        if query:
+            escaped = (
+                query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            where += " AND " if where else "WHERE "
+            where += "lower(product) LIKE ? ESCAPE '\\'"
+            params.append(f"%{escaped.lower()}%")
+        return where, params
+
+    def _grouped(self, filters: Filters, query: str) -> tuple[str, list]:
+        """Per-product totals of the products a selection matches."""
+        where, params = self._matching(filters, query)
+        grouped = (
+            "SELECT product, SUM(units) AS units_sold, SUM(revenue) AS total_revenue "
+            f"FROM sales {where} GROUP BY product"
+        )
+        return grouped, params
+
+    def _rows(
+        self,
+        connection,
+        grouped: str,
+        params: list,
+        sort_by: str,
+        descending: bool,
+        start: int,
+        stop: int,
+    ) -> tuple[dict, ...]:
+        direction = "DESC" if descending else "ASC"
+        names, units, revenue = _columns(
+            connection.execute(
+                f"{grouped} ORDER BY {ORDER_COLUMNS[sort_by]} {direction}, product "
+                "LIMIT ? OFFSET ?",
+                [*params, stop - start, start],
+            ),
+            3,
+        )
+        return tuple(
+            {
+                "id": self.product_ids.get(name, 0),
+                "name": name,
+                "units_sold": int(units_sold),
+                "total_revenue": round(float(total), 2),
+            }
+            for name, units_sold, total in zip(names, units, revenue)
+        )
+
+    def product_page(
+        self,
+        filters: Filters,
+        query: str,
+        sort_by: str,
+        descending: bool,
+        page: int,
+        page_size: int,
+    ) -> tuple[tuple[dict, ...], int, int]:
+        """Rows of one product table page, the match count and the page.
+
+        Mirrors ``topk.product_page``; ``page`` is clamped to the last page
+        that has rows.
+        """
+        grouped, params = self._grouped(filters, query)
+        with self.connection() as connection:
+            (count,) = connection.execute(
+                f"SELECT COUNT(*) FROM ({grouped})", params
+            ).fetchone()
+            page = max(0, min(page, (count - 1) // page_size))
+            rows = self._rows(
+                connection,
+                grouped,
+                params,
+                sort_by,
+                descending,
+                page * page_size,
+                (page + 1) * page_size,
+            )
+        return rows, count, page
+
+    def product_window(
+        self,
+        filters: Filters,
+        query: str,
+        sort_by: str,
+        descending: bool,
+        start: int,
+        size: int,
+    ) -> tuple[tuple[dict, ...], int, int]:
+        """A window of the scrolling product table, the match count and its start.
+
+        Mirrors ``topk.product_window``.
+        """
+        grouped, params = self._grouped(filters, query)
+        with self.connection() as connection:
+            (count,) = connection.execute(
+                f"SELECT COUNT(*) FROM ({grouped})", params
+            ).fetchone()
+            start = max(0, min(start, count - size))
+            rows = self._rows(
+                connection, grouped, params, sort_by, descending, start, start + size
+            )
+        return rows, count, start
+
+
+@functools.cache
+def get_sql_source() -> SqlSource | None:
+    """Return the source at ``RETAIL_SQL_PATH``, or None to use the in-memory store.
+
+    ``RETAIL_SQL_POOL`` bounds the connection pool and ``RETAIL_SQL_TIMEOUT``
+    the seconds a query waits for one of its connections.
+    """
+    if path := os.environ.get("RETAIL_SQL_PATH"):
+        return SqlSource(
+            path,
+            int(os.environ.get("RETAIL_SQL_POOL", "4")),
+            float(os.environ.get("RETAIL_SQL_TIMEOUT", "30")),
+        )
+    return None
@@ -0,0 +1,77 @@
+"""Timings of this worker's startup phases.
+
+The clock starts when this module is imported, which ``app.app`` does
+before anything else. Each ``mark`` closes the phase running since the
+previous one:
+
+* ``import``: Reflex, NumPy and the app modules;
+* ``state``: building the ``DashboardState`` class;
+* ``app``: the component module and ``rx.App`` setup;
+* ``compile``: Reflex compiling or evaluating pages and building the ASGI
+  app, up to the first lifespan task;
+* ``warm_*``: building each shared structure before serving.
+
+The phases are exported on ``/metrics`` and logged once the worker is ready.
+"""
+
+import contextlib
+import functools
+import time
+from collections.abc import Iterator
+
+_STARTED = time.perf_counter()
+
+
+class StartupClock:
+    """Consecutive named phases of process startup."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self._last = started
+        self.phases: dict[str, float] = {}
+        self.ready: float | None = None
+
+    def mark(self, phase: str):
+        """End ``phase`` now; it began where the previous phase ended."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @contextlib.contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Time the block as ``phase``, leaving the time before it unassigned."""
+        self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(phase)
+
+    def finish(self) -> str:
+        """Record the worker as ready and return a one-line breakdown."""
+        self.ready = time.perf_counter() - self.started
+        parts = " ".join(f"{name}={s * 1000:.0f}ms" for name, s in self.phases.items())
+        return f"startup ready in {self.ready * 1000:.0f}ms: {parts}"
+
+    def render(self) -> list[str]:
+        """The phases as Prometheus gauges."""
+        lines = [
+            "# HELP retail_startup_seconds Time spent in each startup phase.",
+            "# TYPE retail_startup_seconds gauge",
+        ]
+        lines += [
+            f'retail_startup_seconds{{phase="{name}"}} {seconds:.6g}'
+            for name, seconds in self.phases.items()
+        ]
+        if self.ready is not None:
+            lines += [
+                "# HELP retail_startup_ready_seconds Time from import to serving.",
+                "# TYPE retail_startup_ready_seconds gauge",
+                f"retail_startup_ready_seconds {self.ready:.6g}",
+            ]
+        return lines
+
+
+@functools.cache
+def get_startup_clock() -> StartupClock:
+    """Return the clock started when this module was imported."""
+    return StartupClock(_STARTED)
@@ -1,5 +1,65 @@
+import asyncio
+import dataclasses
+import datetime
+import functools
+import json
+import math
+import numpy as np
 import reflex as rx
-from typing import TypedDict
+from collections.abc import Callable, Hashable
+from reflex.config import get_config
+from reflex.utils import prerequisites
+from typing import Any, TypedDict
+
+from app.cache import get_result_cache
+from app.downsample import lttb
+from app.engine import Filters, aggregate, date_slice, parse_day
+from app.export import export_query
+from app.ingest import get_ingestor
+from app.kpis import kpi_cards
+from app.metrics import computed_var_timer
+from app.rollups import get_rollups
+from app.sketch import APPROXIMATE_MIN_ROWS
+from app.sql import SqlSource, get_sql_source
+from app.startup import get_startup_clock
+from app.store import get_store
+from app.topk import product_page, product_window
+
+PAGE_SIZE = 10
+# The scrolling table renders rows at a fixed height, so a scroll offset
+# maps to a row index. It is sent windows of ``WINDOW_ROWS`` rows starting
+# at multiples of ``WINDOW_STEP``, enough to cover its ``VIEWPORT_ROWS``
+# visible rows with a margin on both sides wherever they are.
+ROW_HEIGHT = 53
+VIEWPORT_ROWS = 10
+WINDOW_ROWS = 40
+WINDOW_STEP = 20
+# Navigation shared by every session. It lives at module level rather than
+# in DashboardState, so it is never stored in or rehydrated from the
+# per-session state.
+SIDEBAR_ITEMS = (
+    {"icon": "layout-dashboard", "label": "Dashboard", "href": "/"},
+    {"icon": "bar-chart-3", "label": "Analytics", "href": "#"},
+    {"icon": "shopping-bag", "label": "Products", "href": "#"},
+    {"icon": "users", "label": "Customers", "href": "#"},
+    {"icon": "settings", "label": "Settings", "href": "#"},
+)
+
+# Most points the sales chart is sent, about one per three pixels of its
+# width. Zooming in until the window fits the budget shows every period.
+CHART_POINTS = 240
+# Narrowest chart window, as a fraction of the filtered date range.
+MIN_CHART_ZOOM = 1 / 64
+
+# Seconds between checks that a KPI watcher's session is still connected.
+KPI_WATCH_TIMEOUT = 30
+
+# Client tokens of the sessions with an ``apply_filters`` pass or a KPI
+# watcher running in this process. Kept out of the session state, so a
+# worker that dies, or a client that reconnects to another worker, cannot
+# leave a session marked as served.
+_applying: set[str] = set()
+_watching: set[str] = set()
 
 
 class KpiData(TypedDict):
@@ -21,135 +81,479 @@ class ProductData(TypedDict):
     total_revenue: float
 
 
+def sales_series(
+    filters: Filters, granularity: str, zoom: tuple[float, float] = (0.0, 1.0)
+) -> list[SalesData]:
+    """Chart points for a filter set, read from the rollup cube.
+
+    ``zoom`` selects a window of the filtered date range as fractions of
+    it. Windows holding more than ``CHART_POINTS`` periods are downsampled.
+    """
+    source = get_sql_source() or get_rollups()
+    start, end = source.day_range(
+        parse_day(filters.start_date), parse_day(filters.end_date)
+    )
+    days = end - start + 1
+    lo, hi = start + math.floor(zoom[0] * days), start + math.ceil(zoom[1] * days) - 1
+    if isinstance(source, SqlSource):
+        series = source.series(granularity, filters, lo, hi) if lo <= hi else []
+    else:
+        segments = get_store().segment_selection(filters.store, filters.categories)
+        series = source.series(granularity, segments, lo, hi)
+    totals = np.array([total for _, total in series])
+    return [
+        {"name": series[i][0], "sales": round(series[i][1])}
+        for i in lttb(totals, CHART_POINTS).tolist()
+    ]
+
+
+def filter_options() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Store and category names to filter by, from the loaded data's dictionaries."""
+    source = get_sql_source() or get_store()
+    return source.store_names, source.category_names
+
+
+def filter_kpis(filters: Filters) -> list[KpiData]:
+    """KPI cards for a filter set's dates, stores and categories."""
+    if source := get_sql_source():
+
+        def window_totals(start_day: int, end_day: int) -> tuple[float, int]:
+            return source.totals(filters, start_day, end_day)
+
+    else:
+        rollups = get_rollups()
+        segments = get_store().segment_selection(filters.store, filters.categories)
+
+        def window_totals(start_day: int, end_day: int) -> tuple[float, int]:
+            return rollups.totals(start_day, end_day, segments)
+
+    return kpi_cards(
+        window_totals, parse_day(filters.start_date), parse_day(filters.end_date)
+    )
+
+
+def exact_ready(filters: Filters) -> bool:
+    """Whether exact product totals for ``filters`` can be read without a scan."""
+    return (
+        filters == Filters()
+        or get_sql_source() is not None
+        or ("aggregate", filters) in get_result_cache()
+    )
+
+
+def needs_preview(filters: Filters) -> bool:
+    """Whether exact totals for ``filters`` are slow enough to preview first."""
+    if exact_ready(filters):
+        return False
+    rows = date_slice(get_store(), filters.start_date, filters.end_date)
+    return rows.stop - rows.start >= APPROXIMATE_MIN_ROWS
+
+
+@dataclasses.dataclass(frozen=True)
+class TableView:
+    """The search, sort and page or scroll window the product table shows."""
+
+    query: str = ""
+    sort_by: str = "total_revenue"
+    descending: bool = True
+    scrolling: bool = False
+    position: int = 0
+
+
+def product_view(
+    filters: Filters, table: TableView, approximate: bool = False, wait: bool = True
+) -> tuple[tuple[ProductData, ...], int, int]:
+    """The rows the table shows, the match count and the page or window start.
+
+    ``wait`` is False on the event loop, so in-memory lookups compute their
+    own copy rather than wait for a worker thread computing the same one.
+    """
+    source = get_sql_source()
+    if table.scrolling:
+        size = WINDOW_ROWS
+        fetch = source.product_window if source is not None else product_window
+    else:
+        size = PAGE_SIZE
+        fetch = source.product_page if source is not None else product_page
+    if source is None:
+        fetch = functools.partial(fetch, approximate=approximate, wait=wait)
+    return fetch(
+        filters, table.query, table.sort_by, table.descending, table.position, size
+    )
+
+
+def series_key(filters: Filters, granularity: str, zoom: tuple[float, float]) -> tuple:
+    return ("series", filters, granularity, zoom)
+
+
+def kpis_key(filters: Filters) -> tuple:
+    # Cards without an end date compare against today.
+    return ("kpis", filters, datetime.date.today())
+
+
+def products_key(
+    filters: Filters, table: TableView, approximate: bool = False
+) -> tuple:
+    return ("products", filters, table, approximate)
+
+
+def read_view(key: Hashable, compute: Callable[[], Any], pending: Any) -> Any:
+    """A shared view for a computed var, without blocking the event loop.
+
+    In-memory views are cheap once their aggregate is cached, so a miss
+    computes them in place. SQL views are only read: ``prepare_views``
+    queries them on a worker thread, and ``pending`` stands in meanwhile.
+    """
+    cache = get_result_cache()
+    if get_sql_source() is not None:
+        return cache.get(key, pending)
+    return cache.get_or_compute(key, compute, wait=False)
+
+
+def prepare_views(
+    filters: Filters,
+    granularity: str,
+    zoom: tuple[float, float],
+    table: TableView,
+):
+    """Compute the shared results a session's views need into the result cache.
+
+    Run on a worker thread: the NumPy kernels release the GIL on large
+    arrays and SQL queries wait on the database, so the event loop keeps
+    serving other sessions meanwhile. Holds the ingestor's lock for reading,
+    so batches are not folded into the structures while they are read.
+    """
+    cache = get_result_cache()
+    with get_ingestor().lock.reading():
+        if filters != Filters() and get_sql_source() is None:
+            cache.get_or_compute(
+                ("aggregate", filters), lambda: aggregate(get_store(), filters)
+            )
+        cache.get_or_compute(
+            series_key(filters, granularity, zoom),
+            lambda: sales_series(filters, granularity, zoom),
+        )
+        cache.get_or_compute(
+            products_key(filters, table), lambda: product_view(filters, table)
+        )
+        cache.get_or_compute(kpis_key(filters), lambda: filter_kpis(filters))
+
+
+get_startup_clock().mark("import")
+
+
 class DashboardState(rx.State):
     """The state for the retail sales dashboard."""
 
-    kpi_data: list[KpiData] = [
-        {
-            "title": "Today's Revenue",
-            "value": "$405,345",
-            "change": "+2.5%",
-            "change_type": "increase",
-        },
-        {
-            "title": "YoY Growth",
-            "value": "12.8%",
-            "change": "+1.2%",
-            "change_type": "increase",
-        },
-        {
-            "title": "Avg. Transaction Value",
-            "value": "$124.50",
-            "change": "-$2.30",
-            "change_type": "decrease",
-        },
-    ]
-    sidebar_items: list[dict[str, str]] = [
-        {"icon": "layout-dashboard", "label": "Dashboard", "href": "/"},
-        {"icon": "bar-chart-3", "label": "Analytics", "href": "#"},
-        {"icon": "shopping-bag", "label": "Products", "href": "#"},
-        {"icon": "users", "label": "Customers", "href": "#"},
-        {"icon": "settings", "label": "Settings", "href": "#"},
-    ]
+    kpi_data: list[KpiData] = []
     sidebar_collapsed: bool = False
     time_granularity: str = "Monthly"
-    sales_data: list[SalesData] = [
-        {"name": "Jan", "sales": 4000},
-        {"name": "Feb", "sales": 3000},
-        {"name": "Mar", "sales": 2000},
-        {"name": "Apr", "sales": 2780},
-        {"name": "May", "sales": 1890},
-        {"name": "Jun", "sales": 2390},
-        {"name": "Jul", "sales": 3490},
-        {"name": "Aug", "sales": 2000},
-        {"name": "Sep", "sales": 2780},
-        {"name": "Oct", "sales": 1890},
-        {"name": "Nov", "sales": 2390},
-        {"name": "Dec", "sales": 3490},
-    ]
-    store_locations: list[str] = ["New York", "London", "Tokyo", "Paris"]
+    chart_zoom: list[float] = [0.0, 1.0]
     selected_store: str = ""
-    product_categories: list[str] = [
-        "Electronics",
-        "Apparel",
-        "Groceries",
-        "Home Goods",
-        "Books",
-    ]
     selected_categories: list[str] = []
     start_date: str = ""
     end_date: str = ""
-    all_products: list[ProductData] = [
-        {
-            "id": 1,
-            "name": "Quantum-Boost Sneakers",
-            "units_sold": 120,
-            "total_revenue": 18000.0,
-        },
-        {
-            "id": 2,
-            "name": "Chrono-Gauntlet Watch",
-            "units_sold": 85,
-            "total_revenue": 25500.5,
-        },
-        {
-            "id": 3,
-            "name": "Hydro-Dynamic Jacket",
-            "units_sold": 250,
-            "total_revenue": 37500.0,
-        },
-        {
-            "id": 4,
-            "name": "Aero-Graphene T-Shirt",
-            "units_sold": 400,
-            "total_revenue": 14000.0,
-        },
-        {
-            "id": 5,
-            "name": "Gravity-Defy Backpack",
-            "units_sold": 150,
-            "total_revenue": 11250.75,
-        },
-        {
-            "id": 6,
-            "name": "Stealth-Mode Sunglasses",
-            "units_sold": 300,
-            "total_revenue": 9000.0,
-        },
-        {
-            "id": 7,
-            "name": "Kinetic-Charge Shorts",
-            "units_sold": 180,
-            "total_revenue": 7200.0,
-        },
-        {
-            "id": 8,
-            "name": "Cryo-Compression Socks",
-            "units_sold": 500,
-            "total_revenue": 12500.0,
-        },
-        {
-            "id": 9,
-            "name": "Solar-Weave Hat",
-            "units_sold": 220,
-            "total_revenue": 5500.0,
-        },
-        {
-            "id": 10,
-            "name": "Bio-Mimicry Gloves",
-            "units_sold": 130,
-            "total_revenue": 4550.0,
-        },
-    ]
+    # The rows on the current page or scroll window, and the order to show
+    # them in as positions in ``product_rows``.
+    product_rows: list[ProductData] = []
+    row_order: list[int] = []
+    # The filters the views show. Selections apply once ``apply_filters``
+    # has computed them off the event loop.
+    _applied_filters: Filters = Filters()
+    _filter_generation: int = 0
+    _applied_generation: int = 0
+    _approximate_views: bool = False
+    # The ingestor version the views were last refreshed for. The chart and
+    # table vars declare it as a dependency, so they recompute when ingestion
+    # changes the data under unchanged selections.
+    _data_version: int = 0
+
+    @rx.event
+    def set_selected_store(self, store: str):
+        self.selected_store = store
+        return self._request_filters()
+
+    @rx.event
+    def set_start_date(self, date: str):
+        self.start_date = date
+        return self._request_filters()
+
+    @rx.event
+    def set_end_date(self, date: str):
+        self.end_date = date
+        return self._request_filters()
+
+    @rx.event
+    def sync_product_rows(self):
+        if self.views_loading:
+            # A pass cut short, e.g. by a restarted worker, never applied.
+            return self._request_views()
+        return self._show_table()
+
+    def __getstate__(self):
+        """Leave shared computed var values out of the stored state.
+
+        They are recomputed from the process-wide result cache or the loaded
+        data on the next read instead of being written to and read back from
+        the state manager with every event.
+        """
+        state = super().__getstate__()
+        for name in (
+            "sales_data",
+            "filtered_and_sorted_products",
+            "store_locations",
+            "product_categories",
+        ):
+            state.pop(type(self).computed_vars[name]._cache_attr, None)
+        return state
+
+    def _filters(self) -> Filters:
+        return self._applied_filters
+
+    def _requested_filters(self) -> Filters:
+        return Filters.from_selection(
+            self.selected_store,
+            self.selected_categories,
+            self.start_date,
+            self.end_date,
+        )
+
+    def _request_filters(self):
+        self.page = 0
+        return self._request_views()
+
+    def _request_views(self):
+        self._filter_generation += 1
+        return DashboardState.apply_filters
+
+    def _show_filters(self, filters: Filters, approximate: bool = False):
+        self._applied_filters = filters
+        self._approximate_views = approximate
+        self._show_kpis()
+        self._sync_product_rows()
+
+    def _apply_filters(self, filters: Filters, generation: int):
+        self._applied_generation = generation
+        self._show_filters(filters)
+
+    def _show_data(self, version: int):
+        self._data_version = version
+        self._show_kpis()
+        self._sync_product_rows()
+
+    def _show_kpis(self):
+        filters = self._filters()
+        self.kpi_data = read_view(
+            kpis_key(filters), lambda: filter_kpis(filters), self.kpi_data
+        )
+
+    @rx.event(background=True)
+    async def apply_filters(self):
+        """Compute the selected filters on a worker thread, then show them.
+
+        A session runs one of these at a time. Selections made while it
+        computes are picked up by its next pass and the superseded result is
+        discarded, so rapid clicks never queue up stale recomputations.
+        Large slices show approximate product totals from the sketches
+        meanwhile. Also recomputes views whose shared results expired.
+        """
+        token = self.router.session.client_token
+        if token in _applying:
+            return
+        _applying.add(token)
+        try:
+            while True:
+                async with self:
+                    generation = self._filter_generation
+                    filters = self._requested_filters()
+                    views = (
+                        filters,
+                        self.time_granularity,
+                        self._zoom(),
+                        self._table_view(),
+                    )
+                    if needs_preview(filters):
+                        self._show_filters(filters, approximate=True)
+                await asyncio.to_thread(prepare_views, *views)
+                async with self:
+                    if generation == self._filter_generation:
+                        self._apply_filters(filters, generation)
+                        # Release while holding the state, so a selection
+                        # made right after is not dropped by this pass.
+                        _applying.discard(token)
+                        return
+        finally:
+            _applying.discard(token)
+
+    @rx.var
+    def store_locations(self) -> list[str]:
+        return list(filter_options()[0])
+
+    @rx.var
+    def product_categories(self) -> list[str]:
+        return list(filter_options()[1])
+
+    @rx.var
+    def views_loading(self) -> bool:
+        return self._filter_generation != self._applied_generation
+
+    @rx.var
+    def views_approximate(self) -> bool:
+        return self._approximate_views
+
+    @rx.var(deps=["_data_version"])
+    def sales_data(self) -> list[SalesData]:
+        filters = self._filters()
+        granularity = self.time_granularity
+        zoom = self._zoom()
+        with computed_var_timer("sales_data"):
+            return list(
+                read_view(
+                    series_key(filters, granularity, zoom),
+                    lambda: sales_series(filters, granularity, zoom),
+                    [],
+                )
+            )
+
+    @rx.var
+    def chart_zoomed(self) -> bool:
+        return self.chart_zoom[1] - self.chart_zoom[0] < 1
+
+    def _zoom(self) -> tuple[float, float]:
+        return (self.chart_zoom[0], self.chart_zoom[1])
+
+    def _table_view(self) -> TableView:
+        return TableView(
+            self.product_search_query.lower(),
+            self.sort_by,
+            self.sort_order == "desc",
+            self.table_scrolling,
+            self.table_offset if self.table_scrolling else self.page,
+        )
+
+    def _product_page(self) -> tuple[tuple[ProductData, ...], int, int]:
+        """The rows the table shows, the match count and the page or window start."""
+        filters = self._filters()
+        table = self._table_view()
+        # Never scan on the event loop: without the exact totals cached,
+        # preview them from the sketches until ``apply_filters`` has them.
+        approximate = self._approximate_views or not exact_ready(filters)
+        with computed_var_timer("product_page"):
+            return read_view(
+                products_key(filters, table, approximate),
+                lambda: product_view(filters, table, approximate, wait=False),
+                ((), 0, table.position),
+            )
+
+    @rx.var(deps=["_data_version"])
+    def product_count(self) -> int:
+        return self._product_page()[1]
+
+    @rx.var(deps=["_data_version"])
+    def window_padding(self) -> list[str]:
+        """Heights standing in for the rows above and below the scroll window."""
+        if not self.table_scrolling:
+            return ["0px", "0px"]
+        rows, count, start = self._product_page()
+        below = max(count - start - len(rows), 0)
+        return [f"{start * ROW_HEIGHT}px", f"{below * ROW_HEIGHT}px"]
 
     @rx.var
+    def page_count(self) -> int:
+        return max(1, -(-self.product_count // PAGE_SIZE))
+
+    @rx.var(deps=["_data_version"])
+    def current_page(self) -> int:
+        return 0 if self.table_scrolling else self._product_page()[2]
+
+    @rx.var(backend=True, deps=["_data_version"])
     def filtered_and_sorted_products(self) -> list[ProductData]:
-        products = self.all_products
-        if self.product_search_query:
-            search_lower = self.product_search_query.lower()
-            products = [p for p in products if search_lower in p["name"].lower()]
-        is_reverse = self.sort_order == "desc"
-        return sorted(products, key=lambda p: p[self.sort_by], reverse=is_reverse)
+        return list(self._product_page()[0])
+
+    def _refresh_views(self):
+        """Request ``apply_filters`` for views the event loop must not compute.
+
+        Those are the exact totals of the applied filters once they expire
+        from or are evicted by the shared cache, which the table previews
+        from the sketches meanwhile, and any view of a SQL source that is
+        not cached yet.
+        """
+        filters = self._filters()
+        if get_sql_source() is None:
+            if self._approximate_views or exact_ready(filters):
+                return None
+            self._approximate_views = True
+            return self._request_views()
+        cache = get_result_cache()
+        if (
+            series_key(filters, self.time_granularity, self._zoom()) in cache
+            and products_key(filters, self._table_view()) in cache
+        ):
+            return None
+        return self._request_views()
+
+    def _show_table(self):
+        """Sync the rows after a table change, requesting what is missing."""
+        refresh = self._refresh_views()
+        self._sync_product_rows()
+        return refresh
+
+    def _sync_product_rows(self):
+        """Show the rows on the current page or window.
+
+        Only those rows are sent. When an update just reorders the rows the
+        client has, e.g. a sort within a page, only ``row_order`` is.
+        """
+        rows = self._product_page()[0]
+        position = {row["id"]: i for i, row in enumerate(self.product_rows)}
+        order = [position.get(row["id"]) for row in rows]
+        if len(rows) != len(position) or any(
+            i is None or self.product_rows[i] != row for i, row in zip(order, rows)
+        ):
+            self.product_rows = list(rows)
+            order = list(range(len(rows)))
+        if order != self.row_order:
+            self.row_order = order
+
+    @rx.event
+    def export_data(self, fmt: str):
+        """Download the current selection from the streaming export endpoint."""
+        query = export_query(self._filters(), self.product_search_query, fmt)
+        url = f"{get_config().api_url}/export?{query}"
+        return rx.call_script(f"window.location.assign({json.dumps(url)})")
+
+    def _session_connected(self) -> bool:
+        namespace = prerequisites.get_app().app.event_namespace
+        if namespace is None:
+            return True
+        return self.router.session.client_token in namespace.token_to_sid
+
+    @rx.event(background=True)
+    async def watch_kpis(self):
+        """Push the KPI cards to this session whenever ingestion updates them."""
+        token = self.router.session.client_token
+        if token in _watching:
+            return
+        _watching.add(token)
+        ingestor = get_ingestor()
+        version = None
+        try:
+            while self._session_connected():
+                if version != ingestor.version:
+                    version = ingestor.version
+                    async with self:
+                        views = (
+                            self._applied_filters,
+                            self.time_granularity,
+                            self._zoom(),
+                            self._table_view(),
+                        )
+                    await asyncio.to_thread(prepare_views, *views)
+                    async with self:
+                        self._show_data(version)
+                await ingestor.wait(version, timeout=KPI_WATCH_TIMEOUT)
+        finally:
+            _watching.discard(token)
 
     @rx.event
     def toggle_sidebar(self):
@@ -159,6 +563,25 @@ class DashboardState(rx.State):
     @rx.event
     def set_time_granularity(self, new_granularity: str):
         self.time_granularity = new_granularity
+        return self._refresh_views()
+
+    @rx.event
+    def zoom_chart(self, factor: float):
+        """Scale the chart window about its center; below 1 zooms in."""
+        lo, hi = self.chart_zoom
+        width = min(max((hi - lo) * factor, MIN_CHART_ZOOM), 1.0)
+        lo = min(max((lo + hi - width) / 2, 0.0), 1.0 - width)
+        self.chart_zoom = [lo, lo + width]
+        return self._refresh_views()
+
+    @rx.event
+    def pan_chart(self, step: float):
+        """Shift the chart window by ``step`` window widths."""
+        lo, hi = self.chart_zoom
+        width = hi - lo
+        lo = min(max(lo + step * width, 0.0), 1.0 - width)
+        self.chart_zoom = [lo, lo + width]
+        return self._refresh_views()
 
     @rx.event
     def toggle_category(self, category: str):
@@ -166,14 +589,38 @@ class DashboardState(rx.State):
             self.selected_categories.remove(category)
         else:
             self.selected_categories.append(category)
+        return self._request_filters()
 
     product_search_query: str = ""
     sort_by: str = "total_revenue"
     sort_order: str = "desc"
+    page: int = 0
+    table_scrolling: bool = False
+    table_offset: int = 0
+
+    @rx.event
+    def toggle_table_scrolling(self):
+        """Switch the product table between pages and one scrolling list."""
+        self.table_scrolling = not self.table_scrolling
+        self.page = 0
+        self.table_offset = 0
+        return self._show_table()
+
+    @rx.event
+    def scroll_table(self, scroll_top: int):
+        """Move the row window to cover the rows visible at ``scroll_top``."""
+        margin = (WINDOW_ROWS - WINDOW_STEP - VIEWPORT_ROWS) // 2
+        first = max(scroll_top // ROW_HEIGHT - margin, 0)
+        offset = first // WINDOW_STEP * WINDOW_STEP
+        if offset != self.table_offset:
+            self.table_offset = offset
+            return self._show_table()
 
     @rx.event
     def set_product_search_query(self, query: str):
         self.product_search_query = query
+        self.page = 0
+        return self._show_table()
 
     @rx.event
     def set_sorting(self, column: str):
@@ -181,4 +628,19 @@ class DashboardState(rx.State):
             self.sort_order = "asc" if self.sort_order == "desc" else "desc"
         else:
             self.sort_by = column
-            self.sort_order = "desc"
\ No newline at end of file
+            self.sort_order = "desc"
+        self.page = 0
+        return self._show_table()
+
+    @rx.event
+    def next_page(self):
+        self.page = min(self.current_page + 1, self.page_count - 1)
+        return self._show_table()
+
+    @rx.event
+    def previous_page(self):
+        self.page = max(self.current_page - 1, 0)
+        return self._show_table()
+
+
+get_startup_clock().mark("state")
\ No newline at end of file
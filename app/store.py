@@ -0,0 +1,319 @@
+"""Process-wide columnar store for transaction-level sales facts."""
+
+import datetime
+import functools
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+from app.parallel import worker_count
+
+STORE_NAMES = ("New York", "London", "Tokyo", "Paris")
+CATEGORY_NAMES = ("Electronics", "Apparel", "Groceries", "Home Goods", "Books")
+
+# (name, category, unit price) for every product in the catalog; the product id
+# is the position in this tuple.
+PRODUCT_CATALOG = (
+    ("Quantum-Boost Sneakers", "Apparel", 150.0),
+    ("Chrono-Gauntlet Watch", "Electronics", 300.0),
+    ("Hydro-Dynamic Jacket", "Apparel", 150.0),
+    ("Aero-Graphene T-Shirt", "Apparel", 35.0),
+    ("Gravity-Defy Backpack", "Home Goods", 75.0),
+    ("Stealth-Mode Sunglasses", "Electronics", 30.0),
+    ("Kinetic-Charge Shorts", "Apparel", 40.0),
+    ("Cryo-Compression Socks", "Groceries", 25.0),
+    ("Solar-Weave Hat", "Books", 25.0),
+    ("Bio-Mimicry Gloves", "Home Goods", 35.0),
+)
+
+# Fact columns in constructor order, with their storage types.
+COLUMNS = {
+    "store": np.uint16,
+    "category": np.uint8,
+    "product_id": np.int32,
+    "date": np.int32,
+    "units": np.int32,
+    "revenue": np.float64,
+}
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# Shared columns are files on the POSIX shared memory filesystem, so worker
+# processes map the same pages instead of receiving pickled copies.
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def to_day(date: datetime.date) -> int:
+    """Convert a date to the day number used by the date column."""
+    return (date - EPOCH).days
+
+
+def from_day(day: int) -> datetime.date:
+    """Convert a day number from the date column back to a date."""
+    return EPOCH + datetime.timedelta(days=int(day))
+
+
+class SalesStore:
+    """Transaction facts held as parallel NumPy columns, sorted by date.
+
+    Store and category are dictionary-encoded: the columns hold small integer
+    codes and ``store_names`` / ``category_names`` map them back to labels.
+    Dates are stored as days since 1970-01-01. ``segment`` combines the store
+    and category codes as ``store * len(category_names) + category``.
+
+    A ``shared`` store keeps its column buffers in shared memory, described
+    by ``shared_columns`` for worker processes to map.
+    """
+
+    def __init__(
+        self,
+        store: np.ndarray,
+        category: np.ndarray,
+        product_id: np.ndarray,
+        date: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+        store_names: tuple[str, ...] = STORE_NAMES,
+        category_names: tuple[str, ...] = CATEGORY_NAMES,
+        product_names: tuple[str, ...] = tuple(p[0] for p in PRODUCT_CATALOG),
+        shared: bool = False,
+    ):
+        self._init(store_names, category_names, product_names, shared)
+        self._buffers = self._place(
+            self._encode(store, category, product_id, date, units, revenue)
+        )
+        self._set_length(len(self._buffers["date"]))
+
+    def _init(
+        self,
+        store_names: tuple[str, ...],
+        category_names: tuple[str, ...],
+        product_names: tuple[str, ...],
+        shared: bool,
+    ):
+        self.store_names = store_names
+        self.category_names = category_names
+        self.product_names = product_names
+        self.shared = shared
+        # Backing file of each shared column, and the files this store
+        # created and must remove.
+        self._paths: dict[str, str] = {}
+        self._owned: set[str] = set()
+        weakref.finalize(self, _unlink_all, self._owned)
+
+    @classmethod
+    def from_buffers(
+        cls,
+        columns: dict[str, np.ndarray],
+        store_names: tuple[str, ...],
+        category_names: tuple[str, ...],
+        product_names: tuple[str, ...],
+        paths: dict[str, str] | None = None,
+    ) -> "SalesStore":
+        """Adopt already encoded, date-sorted columns without copying them.
+
+        ``paths`` names files backing the columns, which worker processes
+        may map; the store reads them but never removes them.
+        """
+        store = cls.__new__(cls)
+        store._init(store_names, category_names, product_names, paths is not None)
+        store._paths.update(paths or {})
+        store._buffers = dict(columns)
+        store._set_length(len(columns["date"]))
+        return store
+
+    def _encode(
+        self,
+        store: np.ndarray,
+        category: np.ndarray,
+        product_id: np.ndarray,
+        date: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        """Date-sorted, correctly typed columns for a batch of facts."""
+        order = np.argsort(date, kind="stable")
+        columns = {
+            name: np.ascontiguousarray(np.asarray(values)[order], dtype=dtype)
+            for (name, dtype), values in zip(
+                COLUMNS.items(), (store, category, product_id, date, units, revenue)
+            )
+        }
+        # Combined (store, category) code so filters on both need one lookup.
+        columns["segment"] = columns["store"] * np.uint16(
+            len(self.category_names)
+        ) + columns["category"].astype(np.uint16)
+        return columns
+
+    def _empty(self, name: str, capacity: int, dtype: np.dtype) -> np.ndarray:
+        """A new buffer for column ``name``, in shared memory if enabled."""
+        if not self.shared:
+            return np.empty(capacity, dtype=dtype)
+        fd, path = tempfile.mkstemp(prefix=f"retail-{name}-", dir=SHARED_DIR)
+        os.close(fd)
+        # A zero-length file cannot be mapped.
+        buffer = np.memmap(path, dtype=dtype, mode="w+", shape=(max(capacity, 1),))
+        # Workers still mapping the replaced file keep their pages; the name
+        # goes away now and the memory once the last mapping is closed.
+        if (old := self._paths.get(name)) in self._owned:
+            os.unlink(old)
+            self._owned.discard(old)
+        self._paths[name] = path
+        self._owned.add(path)
+        return buffer.view(np.ndarray)[:capacity]
+
+    def _place(self, columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        if not self.shared:
+            return columns
+        placed = {}
+        for name, values in columns.items():
+            placed[name] = self._empty(name, len(values), values.dtype)
+            placed[name][:] = values
+        return placed
+
+    def shared_columns(self) -> dict[str, tuple[str, str, int]]:
+        """Path, dtype and capacity of each shared column buffer."""
+        return {
+            name: (self._paths[name], buffer.dtype.str, len(buffer))
+            for name, buffer in self._buffers.items()
+        }
+
+    def frozen(self) -> "SalesStore":
+        """A store over the current rows that later appends leave unchanged.
+
+        Appends write past the current rows or into new buffers, so the
+        frozen columns are views rather than copies.
+        """
+        return SalesStore.from_buffers(
+            {name: getattr(self, name) for name in self._buffers},
+            self.store_names,
+            self.category_names,
+            self.product_names,
+        )
+
+    def _set_length(self, n_rows: int):
+        for name, buffer in self._buffers.items():
+            setattr(self, name, buffer[:n_rows])
+
+    def append(
+        self,
+        store: np.ndarray,
+        category: np.ndarray,
+        product_id: np.ndarray,
+        date: np.ndarray,
+        units: np.ndarray,
+        revenue: np.ndarray,
+    ):
+        """Append a batch of facts, keeping the columns sorted by date.
+
+        Columns live in buffers that grow geometrically, so appending rows no
+        older than the last stored day costs O(batch) amortized. Late rows fall
+        back to a full merge.
+        """
+        batch = self._encode(store, category, product_id, date, units, revenue)
+        n_rows, n_new = len(self), len(batch["date"])
+        if not n_new:
+            return
+        if n_rows and batch["date"][0] < self.date[-1]:
+            merged = {
+                name: np.concatenate([getattr(self, name), values])
+                for name, values in batch.items()
+            }
+            order = np.argsort(merged["date"], kind="stable")
+            self._buffers = self._place(
+                {name: values[order] for name, values in merged.items()}
+            )
+        else:
+            capacity = len(self._buffers["date"])
+            if n_rows + n_new > capacity:
+                capacity = max(2 * capacity, n_rows + n_new)
+                for name, buffer in self._buffers.items():
+                    grown = self._empty(name, capacity, buffer.dtype)
+                    grown[:n_rows] = buffer[:n_rows]
+                    self._buffers[name] = grown
+            for name, values in batch.items():
+                self._buffers[name][n_rows : n_rows + n_new] = values
+        self._set_length(n_rows + n_new)
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    @property
+    def n_products(self) -> int:
+        return len(self.product_names)
+
+    def segment_selection(
+        self, store_name: str, categories: tuple[str, ...]
+    ) -> np.ndarray | None:
+        """Boolean selection over segment codes for a store/category filter.
+
+        An empty ``store_name`` or ``categories`` selects all of them. Returns
+        None when every segment is selected.
+        """
+        stores = np.ones(len(self.store_names), dtype=bool)
+        if store_name:
+            stores[:] = False
+            if store_name in self.store_names:
+                stores[self.store_names.index(store_name)] = True
+        selected = np.ones(len(self.category_names), dtype=bool)
+        if categories:
+            selected[:] = False
+            for name in categories:
+                if name in self.category_names:
+                    selected[self.category_names.index(name)] = True
+        segments = np.outer(stores, selected).ravel()
+        return None if segments.all() else segments
+
+    @classmethod
+    def synthetic(
+        cls,
+        n_rows: int,
+        end: datetime.date | None = None,
+        days: int = 730,
+        seed: int = 7,
+        shared: bool = False,
+    ) -> "SalesStore":
+        """Generate a reproducible demo dataset covering ``days`` days up to ``end``."""
+        rng = np.random.default_rng(seed)
+        end_day = to_day(end or datetime.date.today())
+        prices = np.array([p[2] for p in PRODUCT_CATALOG])
+        product_category = np.array(
+            [CATEGORY_NAMES.index(p[1]) for p in PRODUCT_CATALOG], dtype=np.uint8
+        )
+        product_id = rng.integers(0, len(PRODUCT_CATALOG), n_rows, dtype=np.int32)
+        units = rng.integers(1, 6, n_rows, dtype=np.int32)
+        return cls(
+            store=rng.integers(0, len(STORE_NAMES), n_rows, dtype=np.uint16),
+            category=product_category[product_id],
+            product_id=product_id,
+            date=rng.integers(end_day - days + 1, end_day + 1, n_rows, dtype=np.int32),
+            units=units,
+            revenue=units * prices[product_id],
+            shared=shared,
+        )
+
+
+def _unlink_all(paths: set[str]):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+@functools.cache
+def get_store() -> SalesStore:
+    """Return the store shared by every session in this process.
+
+    It is mapped from the current snapshot when one is configured. Otherwise
+    a synthetic store is generated, with its columns in shared memory when
+    aggregation runs on worker processes.
+    """
+    from app.snapshot import get_snapshot
+
+    if (snapshot := get_snapshot()) is not None:
+        return snapshot.store
+    n_rows = int(os.environ.get("RETAIL_SYNTHETIC_ROWS", "200000"))
+    return SalesStore.synthetic(n_rows, shared=worker_count() > 1)
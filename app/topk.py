@@ -0,0 +1,264 @@
+"""Top-K product selection for the product table."""
+
+import functools
+
+import numpy as np
+
+from app.cache import get_result_cache
+from app.engine import Filters, aggregate, parse_day
+from app.search import get_search_index
+from app.sketch import get_product_sketches
+from app.snapshot import get_snapshot
+from app.store import SalesStore, get_store
+
+SORT_KEYS = ("name", "units_sold", "total_revenue")
+
+
+def name_rank(names: tuple[str, ...]) -> np.ndarray:
+    """Position of each name in sorted order, so names sort as integers."""
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[np.argsort(np.array(names))] = np.arange(len(names))
+    return rank
+
+
+def select(
+    values: np.ndarray, candidates: np.ndarray | None, descending: bool, stop: int
+) -> np.ndarray:
+    """Ids of the first ``stop`` candidates ordered by ``values``.
+
+    Uses a partial partition so only the selected ids are fully sorted. Ties
+    are broken by id, matching a stable sort over the catalog order.
+    """
+    ids = np.arange(len(values)) if candidates is None else candidates
+    keys = values[ids]
+    if descending:
+        keys = -keys
+    if 0 < stop < len(ids):
+        # Keep every tie of the last selected key, so the lowest ids win.
+        kept = keys <= np.partition(keys, stop - 1)[stop - 1]
+        ids, keys = ids[kept], keys[kept]
+    return ids[np.lexsort((ids, keys))][:stop]
+
+
+def ranked(rank: np.ndarray, candidates: np.ndarray, stop: int) -> np.ndarray:
+    """The first ``stop`` of ``candidates`` ordered by a cached ``rank``.
+
+    Ranks are distinct integers with ties already broken, so this is one
+    partition and one single-key sort of the selected ids.
+    """
+    keys = rank[candidates]
+    if 0 < stop < len(candidates):
+        part = np.argpartition(keys, stop - 1)[:stop]
+        candidates, keys = candidates[part], keys[part]
+    return candidates[np.argsort(keys)][:stop]
+
+
+class TopKIndex:
+    """Maintained top-K ids per sort key and direction over catalog totals.
+
+    Serves the unfiltered product table. Sales only ever add to totals, so a
+    descending top-K stays valid after merging in the products a batch
+    touched, and an ascending one only needs rebuilding when a batch touched
+    one of its members or sold a product for the first time.
+
+    The rank of every product under each key is cached as well, for
+    searches and pages past the top-K. Name ranks never change; the others
+    are dropped whenever totals change.
+    """
+
+    def __init__(
+        self, names: tuple[str, ...], units: np.ndarray, revenue: np.ndarray, k: int
+    ):
+        self.k = k
+        self.values = {
+            "name": name_rank(names),
+            "units_sold": units.astype(np.int64),
+            "total_revenue": revenue.astype(np.float64),
+        }
+        self.sold = np.flatnonzero(units)
+        self._top: dict[tuple[str, bool], np.ndarray] = {}
+        self._ranks: dict[tuple[str, bool], np.ndarray] = {}
+
+    @classmethod
+    def from_store(cls, store: SalesStore, k: int = 100) -> "TopKIndex":
+        totals = aggregate(store, Filters())
+        return cls(store.product_names, totals.product_units, totals.product_revenue, k)
+
+    def top(self, key: str, descending: bool, stop: int) -> np.ndarray:
+        """The first ``stop`` sold product ids in ``key`` order."""
+        if stop > self.k:
+            return ranked(self.rank(key, descending), self.sold, stop)
+        if (key, descending) not in self._top:
+            self._top[key, descending] = select(
+                self.values[key], self.sold, descending, self.k
+            )
+        return self._top[key, descending][:stop]
+
+    def rank(self, key: str, descending: bool) -> np.ndarray:
+        """Position of every product id in ``key`` order, ties broken by id."""
+        if (key, descending) not in self._ranks:
+            values = self.values[key]
+            ids = np.arange(len(values))
+            rank = np.empty(len(values), dtype=np.int64)
+            rank[np.lexsort((ids, -values if descending else values))] = ids
+            self._ranks[key, descending] = rank
+        return self._ranks[key, descending]
+
+    def add_sales(self, product_id: np.ndarray, units: np.ndarray, revenue: np.ndarray):
+        """Fold a batch of sales into the totals and repair the cached top-Ks."""
+        np.add.at(self.values["units_sold"], product_id, units)
+        np.add.at(self.values["total_revenue"], product_id, revenue)
+        touched = np.unique(product_id)
+        newly_sold = np.setdiff1d(touched, self.sold, assume_unique=True)
+        self.sold = np.union1d(self.sold, touched)
+        for key, descending in list(self._ranks):
+            if key != "name":
+                del self._ranks[key, descending]
+        if (units < 0).any() or (revenue < 0).any():
+            # Returns can move a product down, which a merge cannot repair.
+            self._top.clear()
+            return
+        for (key, descending), top in list(self._top.items()):
+            if key != "name" and descending:
+                candidates = np.union1d(top, touched)
+                self._top[key, descending] = select(
+                    self.values[key], candidates, True, self.k
+                )
+            elif len(newly_sold) or (key != "name" and np.isin(touched, top).any()):
+                # A newly listed product or a grown bottom-K member can
+                # reshuffle the set; rebuild lazily on the next read.
+                del self._top[key, descending]
+
+
+@functools.cache
+def get_topk_index() -> TopKIndex:
+    """Return the top-K index for the shared sales store."""
+    if (snapshot := get_snapshot()) is not None:
+        store = snapshot.store
+        return TopKIndex(
+            store.product_names, snapshot.product_units, snapshot.product_revenue, 100
+        )
+    return TopKIndex.from_store(get_store())
+
+
+def _matches(
+    filters: Filters, query: str, approximate: bool, wait: bool
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Ids of the products a selection matches and the values they sort by."""
+    store, index = get_store(), get_topk_index()
+    if filters == Filters():
+        candidates, values = index.sold, index.values
+    else:
+        if approximate:
+            units, revenue, _ = get_product_sketches().totals(
+                parse_day(filters.start_date),
+                parse_day(filters.end_date),
+                store.segment_selection(filters.store, filters.categories),
+            )
+        else:
+            result = get_result_cache().get_or_compute(
+                ("aggregate", filters), lambda: aggregate(store, filters), wait
+            )
+            units, revenue = result.product_units, result.product_revenue
+        candidates = np.flatnonzero(units)
+        values = {
+            "name": index.values["name"],
+            "units_sold": units,
+            "total_revenue": revenue,
+        }
+    if query:
+        matches = get_search_index().matching(query)
+        candidates = np.intersect1d(candidates, matches, assume_unique=True)
+    return candidates, values
+
+
+def _ordered(
+    filters: Filters,
+    query: str,
+    candidates: np.ndarray,
+    values: dict[str, np.ndarray],
+    sort_by: str,
+    descending: bool,
+    stop: int,
+) -> np.ndarray:
+    """The first ``stop`` of ``candidates`` in table order."""
+    index = get_topk_index()
+    if filters == Filters() and not query:
+        return index.top(sort_by, descending, stop)
+    if filters == Filters() or sort_by == "name":
+        # Catalog totals and names are ranked already.
+        return ranked(index.rank(sort_by, descending), candidates, stop)
+    return select(values[sort_by], candidates, descending, stop)
+
+
+def _rows(ids: np.ndarray, values: dict[str, np.ndarray]) -> tuple[dict, ...]:
+    names = get_store().product_names
+    return tuple(
+        {
+            "id": int(product_id) + 1,
+            "name": names[product_id],
+            "units_sold": int(values["units_sold"][product_id]),
+            "total_revenue": round(float(values["total_revenue"][product_id]), 2),
+        }
+        for product_id in ids
+    )
+
+
+def product_page(
+    filters: Filters,
+    query: str,
+    sort_by: str,
+    descending: bool,
+    page: int,
+    page_size: int,
+    approximate: bool = False,
+    wait: bool = True,
+) -> tuple[tuple[dict, ...], int, int]:
+    """Rows of one page of the product table, the match count and the page.
+
+    ``page`` is clamped to the last page that has rows. ``approximate``
+    reads filtered totals from the product sketches instead of scanning.
+    ``wait`` is passed to the result cache, so callers on the event loop
+    never block on another thread's computation.
+    """
+    candidates, values = _matches(filters, query, approximate, wait)
+    count = len(candidates)
+    page = max(0, min(page, (count - 1) // page_size))
+    start, stop = page * page_size, (page + 1) * page_size
+    ids = _ordered(filters, query, candidates, values, sort_by, descending, stop)
+    return _rows(ids[start:stop], values), count, page
+
+
+def product_window(
+    filters: Filters,
+    query: str,
+    sort_by: str,
+    descending: bool,
+    start: int,
+    size: int,
+    approximate: bool = False,
+    wait: bool = True,
+) -> tuple[tuple[dict, ...], int, int]:
+    """A window of ``size`` rows of the scrolling product table from ``start``.
+
+    Also returns the match count and the start, which is clamped so the
+    window ends at the last row at most. The whole matching id list is
+    sorted once per selection and cached, so every further window is a
+    slice of it whatever the match count. ``wait`` is as in
+    ``product_page``.
+    """
+
+    def order() -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        candidates, values = _matches(filters, query, approximate, wait)
+        ids = _ordered(
+            filters, query, candidates, values, sort_by, descending, len(candidates)
+        )
+        return ids, values
+
+    ids, values = get_result_cache().get_or_compute(
+        ("product_order", filters, query, sort_by, descending, approximate),
+        order,
+        wait,
+    )
+    start = max(0, min(start, len(ids) - size))
+    return _rows(ids[start : start + size], values), len(ids), start
@@ -0,0 +1,100 @@
+"""Benchmark backend worker startup, phase by phase, in fresh interpreters.
+
+Each run starts a new Python process that imports the app, evaluates its
+pages as a backend worker without compiled output does, builds the shared
+structures, and reports the phases recorded by ``app.startup``. The
+``compile`` phase here is page evaluation only; nothing is written to
+``.web``. Run from the repository root:
+
+    python -m benchmarks.bench_startup --dataset 10k
+    python -m benchmarks.bench_startup --dataset 10k --check
+    python -m benchmarks.bench_startup --dataset 10k --update-baseline
+
+``--check`` exits non-zero when the median time to ready regresses past the
+tolerance against the ``startup`` entry of ``benchmarks/baseline.json``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.bench_state import BASELINE, DATASETS
+
+
+def _child() -> int:
+    import app.app as module
+
+    clock = module.get_startup_clock()
+    for route in list(module.app._unevaluated_pages):
+        module.app._compile_page(route, save_page=False)
+    module.warm_up()
+    print(json.dumps({"phases": clock.phases, "ready": clock.ready}))
+    return 0
+
+
+def run_once(n_rows: int) -> dict:
+    """Phase timings in seconds of one fresh worker start."""
+    env = {**os.environ, "RETAIL_SYNTHETIC_ROWS": str(n_rows)}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="10k", choices=DATASETS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    if args.child:
+        return _child()
+
+    runs = [run_once(DATASETS[args.dataset]) for _ in range(args.runs)]
+    phases = {
+        name: round(statistics.median(run["phases"][name] for run in runs) * 1000, 1)
+        for name in runs[0]["phases"]
+    }
+    result = {
+        args.dataset: {
+            "ready_ms": round(
+                statistics.median(run["ready"] for run in runs) * 1000, 1
+            ),
+            "phases_ms": phases,
+        }
+    }
+    print(f"{args.dataset}: ready in {result[args.dataset]['ready_ms']} ms (median)")
+    for name, ms in phases.items():
+        print(f"  {name:<16} {ms:>9.1f} ms")
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline.setdefault("startup", {}).update(result)
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+    if args.check:
+        expected = json.loads(BASELINE.read_text()).get("startup", {})
+        expected = expected.get(args.dataset)
+        if expected is None:
+            return 0
+        limit = expected["ready_ms"] * (1 + args.tolerance)
+        if result[args.dataset]["ready_ms"] > limit:
+            print(
+                f"REGRESSION startup/{args.dataset}: ready_ms "
+                f"{result[args.dataset]['ready_ms']} > {limit:.1f}"
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Benchmark DashboardState event handlers and computed vars without a browser.
+
+Each scenario runs a handler on a fresh-from-cache state, then builds the
+delta Reflex would send, so the timing covers handler execution, computed
+var recomputation and delta serialization. Run from the repository root:
+
+    python -m benchmarks.bench_state --datasets 10k,1m
+    python -m benchmarks.bench_state --datasets 10k --check
+    python -m benchmarks.bench_state --datasets 10k,1m --update-baseline
+
+``--check`` exits non-zero when a scenario's p50 latency or delta size
+regresses past the tolerance against ``benchmarks/baseline.json``. Latency
+baselines are specific to the machine that recorded them; regenerate them
+on the reference host with ``--update-baseline``.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import resource
+import sys
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+DATASETS = {"10k": 10_000, "1m": 1_000_000, "50m": 50_000_000}
+BASELINE = pathlib.Path(__file__).with_name("baseline.json")
+
+
+def load_dataset(n_rows: int):
+    """Point every shared structure at a synthetic store of ``n_rows`` rows."""
+    os.environ["RETAIL_SYNTHETIC_ROWS"] = str(n_rows)
+    from app import cache, ingest, rollups, search, sketch, snapshot, store, topk
+
+    for getter in (
+        snapshot.get_snapshot,
+        store.get_store,
+        rollups.get_rollups,
+        topk.get_topk_index,
+        search.get_search_index,
+        sketch.get_product_sketches,
+        cache.get_result_cache,
+        ingest.get_ingestor,
+    ):
+        getter.cache_clear()
+    store.get_store()
+    rollups.get_rollups()
+    topk.get_topk_index()
+    search.get_search_index()
+
+
+CATEGORIES = ["Books", "Apparel"]
+SORT_KEYS = ["units_sold", "name", "total_revenue"]
+QUERIES = ["s", "so", "sol", "solar", "ha", "hat"]
+GRANULARITIES = ["Daily", "Weekly", "Monthly"]
+
+
+def _toggle_category(state, i: int):
+    # Run the work the apply_filters background event would do, inline.
+    from app.state import prepare_views
+
+    state.toggle_category(CATEGORIES[i % 2])
+    filters = state._requested_filters()
+    prepare_views(filters, state.time_granularity, state._zoom(), state._table_view())
+    state._apply_filters(filters, state._filter_generation)
+
+
+def _sales_data(state, i: int):
+    state.set_time_granularity(GRANULARITIES[i % 3])
+    return state.sales_data
+
+
+def _filtered_and_sorted_products(state, i: int):
+    state.set_sorting(SORT_KEYS[i % 3])
+    return state.filtered_and_sorted_products
+
+
+# Handler calls to time; each cycles through inputs so every run changes state.
+SCENARIOS: dict[str, Callable] = {
+    "toggle_category": _toggle_category,
+    "set_sorting": lambda s, i: s.set_sorting(SORT_KEYS[i % 3]),
+    "set_product_search_query": lambda s, i: s.set_product_search_query(
+        QUERIES[i % len(QUERIES)]
+    ),
+    "set_time_granularity": lambda s, i: s.set_time_granularity(GRANULARITIES[i % 3]),
+    "sales_data": _sales_data,
+    "filtered_and_sorted_products": _filtered_and_sorted_products,
+}
+
+
+def run_scenario(action: Callable, iterations: int, warm: bool) -> dict[str, float]:
+    """Time ``action`` plus delta building; report p50/p99 and delta size."""
+    from app.cache import get_result_cache
+    from app.state import DashboardState
+
+    state = DashboardState(_reflex_internal_init=True)
+    state.get_delta()
+    state._clean()
+    timings, sizes = [], []
+    for i in range(iterations):
+        if not warm:
+            get_result_cache().invalidate()
+        start = time.perf_counter()
+        action(state, i)
+        delta = json.dumps(state.get_delta(), default=str)
+        timings.append(time.perf_counter() - start)
+        sizes.append(len(delta))
+        state._clean()
+    timings_ms = np.array(timings) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(timings_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings_ms, 99)), 3),
+        "delta_bytes": int(np.median(sizes)),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def compare(
+    results: dict, baseline: dict, tolerance: float, slack_ms: float
+) -> list[str]:
+    """Descriptions of every metric that regressed past ``tolerance``.
+
+    Latencies also get ``slack_ms`` of absolute headroom, so sub-millisecond
+    timer noise does not fail the check.
+    """
+    failures = []
+    for dataset, scenarios_ in results.items():
+        for name, metrics in scenarios_.get("scenarios", {}).items():
+            expected = baseline.get(dataset, {}).get("scenarios", {}).get(name)
+            if expected is None:
+                continue
+            for metric in ("p50_ms", "delta_bytes"):
+                limit = expected[metric] * (1 + tolerance)
+                if metric == "p50_ms":
+                    limit = max(limit, expected[metric] + slack_ms)
+                if metrics[metric] > limit:
+                    failures.append(
+                        f"{dataset}/{name}: {metric} {metrics[metric]} > {limit:.3f}"
+                    )
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", default="10k", help="comma-separated sizes")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument(
+        "--warm", action="store_true", help="keep the shared result cache"
+    )
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--slack-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for dataset in args.datasets.split(","):
+        load_start = time.perf_counter()
+        load_dataset(DATASETS[dataset])
+        results[dataset] = {
+            "load_s": round(time.perf_counter() - load_start, 2),
+            "scenarios": {
+                name: run_scenario(action, args.iterations, args.warm)
+                for name, action in SCENARIOS.items()
+            },
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"{dataset}: loaded in {results[dataset]['load_s']} s")
+        for name, metrics in results[dataset]["scenarios"].items():
+            print(
+                f"  {name:<30} p50 {metrics['p50_ms']:>9.3f} ms"
+                f"  p99 {metrics['p99_ms']:>9.3f} ms"
+                f"  delta {metrics['delta_bytes']:>7} B"
+            )
+        print(f"  peak RSS {results[dataset]['peak_rss_mb']} MB")
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline.update(results)
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+    if args.check:
+        baseline = json.loads(BASELINE.read_text())
+        failures = compare(results, baseline, args.tolerance, args.slack_ms)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import datetime
+
+import pytest
+
+from app.store import SalesStore
+
+
+@pytest.fixture(scope="session")
+def store() -> SalesStore:
+    """A small synthetic store spanning two years of days."""
+    return SalesStore.synthetic(5_000, end=datetime.date(2025, 6, 30))
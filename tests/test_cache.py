@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from app.cache import ResultCache
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_compute("k", compute))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.coalesced == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(value is results[0] for value in results)
+    assert cache.stats()["misses"] == 1
+    assert cache.get_or_compute("k", compute) is results[0]
+    assert len(calls) == 1
+
+
+def test_waiters_see_the_error_and_nothing_is_cached():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute("k", fail)
+        except ValueError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    wait_until(lambda: cache.coalesced == 1)
+    release.set()
+    leader.join()
+    waiter.join()
+    assert len(errors) == 2
+    assert "k" not in cache
+    assert cache.get_or_compute("k", lambda: 1) == 1
+
+
+def test_no_wait_caller_computes_its_own_copy():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=cache.get_or_compute, args=("k", slow))
+    leader.start()
+    started.wait(5)
+    assert cache.get_or_compute("k", lambda: "own", wait=False) == "own"
+    release.set()
+    leader.join()
+    assert cache.get("k") == "leader"
+
+
+def test_invalidation_mid_flight_does_not_store():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def stale():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", stale))
+    )
+    leader.start()
+    started.wait(5)
+    cache.invalidate()
+    release.set()
+    leader.join()
+    assert results == ["stale"]
+    assert "k" not in cache
+
+
+@pytest.mark.parametrize("maxsize", [1, 3])
+def test_least_recently_used_entries_are_evicted(maxsize):
+    cache = ResultCache(maxsize=maxsize)
+    order = []
+    for key in range(6):
+        cache.get_or_compute(key, lambda key=key: key)
+        order.append(key)
+        if key % 2:
+            # Reading an older key makes it the most recently used.
+            cache.get_or_compute(order[-2], lambda: None)
+            order.append(order.pop(-2))
+        kept = order[-maxsize:]
+        assert all(k in cache for k in kept)
+        assert not any(k in cache for k in order[:-maxsize])
+
+
+def test_expired_entries_are_recomputed():
+    cache = ResultCache(ttl=0.0)
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute("k", lambda: calls.append(1))
+    assert len(calls) == 3
+    assert cache.get("k", "missing") == "missing"
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.downsample import lttb
+
+
+def brute_lttb(values: np.ndarray, budget: int) -> list[int]:
+    """Textbook LTTB over the same buckets, one point at a time."""
+    n = len(values)
+    if n <= budget or budget < 3:
+        return list(range(n))
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64).tolist()
+    selected, previous = [0], 0
+    for bucket in range(budget - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = (hi + edges[bucket + 2] - 1) / 2
+            next_y = values[hi : edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = n - 1, values[n - 1]
+        best, best_area = lo, -1.0
+        for x in range(lo, hi):
+            area = abs(
+                (previous - next_x) * (values[x] - values[previous])
+                - (previous - x) * (next_y - values[previous])
+            )
+            if area > best_area:
+                best, best_area = x, area
+        selected.append(best)
+        previous = best
+    return [*selected, n - 1]
+
+
+@pytest.mark.parametrize("n, budget", [(10, 3), (100, 7), (1000, 240), (241, 240)])
+def test_matches_brute_force(n, budget):
+    values = np.random.default_rng(n).normal(size=n).cumsum()
+    assert lttb(values, budget).tolist() == brute_lttb(values, budget)
+
+
+def test_keeps_the_ends_and_the_budget():
+    values = np.random.default_rng(1).random(500)
+    selected = lttb(values, 50)
+    assert len(selected) == 50
+    assert selected[0] == 0 and selected[-1] == 499
+    assert (np.diff(selected) > 0).all()
+
+
+def test_keeps_a_lone_spike():
+    values = np.zeros(1000)
+    values[637] = 100.0
+    assert 637 in lttb(values, 20)
+
+
+@pytest.mark.parametrize("n, budget", [(5, 10), (10, 10), (10, 2)])
+def test_short_series_are_returned_whole(n, budget):
+    assert lttb(np.arange(n, dtype=float), budget).tolist() == list(range(n))
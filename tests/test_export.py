@@ -0,0 +1,108 @@
+import csv
+import io
+import urllib.parse
+
+import pytest
+from starlette.testclient import TestClient
+
+import app.export
+from app.engine import Filters
+from app.export import export_api, export_query
+from app.search import SearchIndex
+from app.store import from_day
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(app.export, "get_store", lambda: store)
+    monkeypatch.setattr(
+        app.export, "get_search_index", lambda: SearchIndex(store.product_names)
+    )
+    # Several chunks per export, so rows must carry over between them.
+    monkeypatch.setattr(app.export, "CHUNK_ROWS", 700)
+    return TestClient(export_api)
+
+
+def brute_rows(store, filters, query=""):
+    rows = []
+    for day, code, category, product, units, revenue in zip(
+        store.date,
+        store.store,
+        store.category,
+        store.product_id,
+        store.units,
+        store.revenue,
+    ):
+        row = (
+            from_day(day).isoformat(),
+            store.store_names[code],
+            store.category_names[category],
+            store.product_names[product],
+            int(units),
+            round(float(revenue), 2),
+        )
+        if (
+            filters.store in ("", row[1])
+            and (not filters.categories or row[2] in filters.categories)
+            and (not filters.start_date or row[0] >= filters.start_date)
+            and (not filters.end_date or row[0] <= filters.end_date)
+            and query.lower() in row[3].lower()
+        ):
+            rows.append(row)
+    return rows
+
+
+def selections(store):
+    first, last = int(store.date.min()), int(store.date.max())
+    yield Filters(), ""
+    yield (
+        Filters(
+            store.store_names[1],
+            store.category_names[:2],
+            from_day(first + 30).isoformat(),
+            from_day(last - 100).isoformat(),
+        ),
+        "",
+    )
+    yield Filters(categories=store.category_names[2:3]), "SOCK"
+
+
+def test_csv_export_rows(client, store):
+    for filters, query in selections(store):
+        response = client.get(f"/export?{export_query(filters, query, 'csv')}")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        header, *rows = csv.reader(io.StringIO(response.text))
+        assert header == list(app.export.COLUMNS)
+        got = [
+            (date, code, category, product, int(units), float(revenue))
+            for date, code, category, product, units, revenue in rows
+        ]
+        assert got == brute_rows(store, filters, query)
+
+
+def test_parquet_export_rows(client, store):
+    pq = pytest.importorskip("pyarrow.parquet")
+    for filters, query in selections(store):
+        response = client.get(f"/export?{export_query(filters, query, 'parquet')}")
+        assert response.status_code == 200
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.column_names == list(app.export.COLUMNS)
+        got = [
+            (
+                row["date"].isoformat(),
+                row["store"],
+                row["category"],
+                row["product"],
+                row["units"],
+                round(row["revenue"], 2),
+            )
+            for row in table.to_pylist()
+        ]
+        assert got == brute_rows(store, filters, query)
+
+
+def test_unknown_format_is_rejected(client):
+    query = urllib.parse.urlencode({"format": "xlsx"})
+    response = client.get(f"/export?{query}")
+    assert response.status_code == 400
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.ingest import BACKFILL_DAYS, DataLock, parse_rows
+from app.store import from_day, to_day
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def hold_reading(lock, entered, release):
+    with lock.reading():
+        entered.set()
+        release.wait(5)
+
+
+def test_writer_waits_for_readers_and_holds_off_new_ones():
+    lock = DataLock()
+    events = []
+    entered, release = threading.Event(), threading.Event()
+    reader = threading.Thread(target=hold_reading, args=(lock, entered, release))
+    reader.start()
+    entered.wait(5)
+
+    def late_reader():
+        with lock.reading():
+            events.append("late reader")
+
+    async def write():
+        late = threading.Thread(target=late_reader)
+        writing = lock.writing()
+        writer = asyncio.ensure_future(writing.__aenter__())
+        await asyncio.to_thread(wait_until, lambda: lock._waiting == 1)
+        late.start()
+        await asyncio.sleep(0.05)
+        assert not writer.done() and not events
+        release.set()
+        await writer
+        events.append("writer")
+        await asyncio.sleep(0.05)
+        assert events == ["writer"]
+        await writing.__aexit__(None, None, None)
+        await asyncio.to_thread(late.join, 5)
+
+    asyncio.run(write())
+    reader.join()
+    assert events == ["writer", "late reader"]
+
+
+def test_cancelled_writer_releases_the_lock():
+    lock = DataLock()
+    entered, release = threading.Event(), threading.Event()
+    reader = threading.Thread(target=hold_reading, args=(lock, entered, release))
+    reader.start()
+    entered.wait(5)
+
+    async def cancel_writer():
+        async def write():
+            async with lock.writing():
+                raise AssertionError("cancelled writers never run")
+
+        task = asyncio.ensure_future(write())
+        await asyncio.to_thread(wait_until, lambda: lock._waiting == 1)
+        task.cancel()
+        release.set()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.to_thread(wait_until, lambda: not lock._writing)
+
+    asyncio.run(cancel_writer())
+    reader.join()
+    with lock.reading():
+        pass
+
+
+def sale(store, day=None, units="2", revenue="19.90", product=None):
+    date = from_day(store.date[-1] if day is None else day).isoformat()
+    name = store.product_names[0] if product is None else product
+    return [date, store.store_names[1], store.category_names[2], name, units, revenue]
+
+
+def test_parse_rows_encodes_valid_rows(store):
+    first = int(store.date[0])
+    rows = [
+        ["date", "store", "category", "product", "units", "revenue"],
+        sale(store),
+        [],
+        sale(store, day=first - BACKFILL_DAYS, units="-1", revenue="-9.95"),
+    ]
+    batch, rejected = parse_rows(store, rows)
+    assert rejected == 0
+    assert batch["date"].tolist() == [int(store.date[-1]), first - BACKFILL_DAYS]
+    assert batch["store"].tolist() == [1, 1]
+    assert batch["category"].tolist() == [2, 2]
+    assert batch["product_id"].tolist() == [0, 0]
+    assert batch["units"].tolist() == [2, -1]
+    assert batch["revenue"].tolist() == [19.9, -9.95]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"units": str(2**31)},
+        {"units": str(-(2**31) - 1)},
+        {"units": "1.5"},
+        {"revenue": "nan"},
+        {"revenue": "inf"},
+        {"revenue": "-1e400"},
+        {"revenue": "abc"},
+        {"product": "Unknown Widget"},
+        {"day": 0},
+        {"day": -719162},
+    ],
+)
+def test_parse_rows_rejects_bad_values(store, change):
+    batch, rejected = parse_rows(store, [sale(store), sale(store, **change)])
+    assert rejected == 1
+    assert len(batch["date"]) == 1
+
+
+def test_parse_rows_bounds_the_dates(store):
+    tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    rows = [
+        sale(store, day=int(store.date[0]) - BACKFILL_DAYS - 1),
+        [tomorrow, *sale(store)[1:]],
+        sale(store, day=to_day(datetime.date.today()) + 2),
+        ["2025-02-30", *sale(store)[1:]],
+        sale(store)[:5],
+    ]
+    batch, rejected = parse_rows(store, rows)
+    assert rejected == 4
+    assert batch["date"].dtype == np.int32 and len(batch["date"]) == 1
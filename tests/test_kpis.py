@@ -0,0 +1,74 @@
+import datetime
+
+from app.kpis import YEAR_DAYS, kpi_cards
+from app.store import to_day
+
+END = to_day(datetime.date(2025, 6, 30))
+
+
+def window_totals(days):
+    """Totals over a window of a ``{day: (revenue, count)}`` mapping."""
+
+    def totals(start, end):
+        sales = [days[day] for day in range(start, end + 1) if day in days]
+        return sum(revenue for revenue, _ in sales), sum(count for _, count in sales)
+
+    return totals
+
+
+def changes(cards):
+    return [(card["value"], card["change"], card["change_type"]) for card in cards]
+
+
+def test_changes_are_signed_by_direction():
+    # Two-day windows: this one, the one before, and both a year earlier.
+    days = {
+        END: (700.0, 7),
+        END - 1: (500.0, 3),
+        END - 2: (400.0, 2),
+        END - 3: (400.0, 2),
+        END - YEAR_DAYS: (300.0, 3),
+        END - YEAR_DAYS - 1: (300.0, 3),
+        END - YEAR_DAYS - 2: (800.0, 8),
+        END - YEAR_DAYS - 3: (800.0, 8),
+    }
+    cards = kpi_cards(window_totals(days), END - 1, END)
+    assert [card["title"] for card in cards] == [
+        "Revenue",
+        "YoY Growth",
+        "Avg. Transaction Value",
+    ]
+    assert changes(cards) == [
+        ("$1,200", "+50.0%", "increase"),
+        # 100% growth against -50% a year before.
+        ("100.0%", "+150.0%", "increase"),
+        ("$120.00", "-$80.00", "decrease"),
+    ]
+
+
+def test_changes_that_round_to_zero_are_neutral():
+    days = {END: (100_000.0, 10_000), END - 1: (100_002.0, 10_000)}
+    revenue, _, average = changes(kpi_cards(window_totals(days), END, END))
+    assert revenue == ("$100,000", "0.0%", "neutral")
+    assert average == ("$10.00", "$0.00", "neutral")
+
+
+def test_missing_comparisons_are_not_available():
+    cards = kpi_cards(window_totals({END: (50.0, 2)}), END, END)
+    assert changes(cards) == [
+        ("$50", "n/a", "neutral"),
+        ("n/a", "n/a", "neutral"),
+        ("$25.00", "n/a", "neutral"),
+    ]
+    cards = kpi_cards(window_totals({}), END, END)
+    assert changes(cards)[2] == ("$0.00", "n/a", "neutral")
+
+
+def test_no_dates_compare_today_with_yesterday():
+    today = to_day(datetime.date.today())
+    days = {today: (30.0, 1), today - 1: (20.0, 1)}
+    cards = kpi_cards(window_totals(days))
+    assert cards[0]["title"] == "Today's Revenue"
+    assert changes(cards)[0] == ("$30", "+50.0%", "increase")
+    # A start after the end shows the end day alone.
+    assert changes(kpi_cards(window_totals(days), today + 5, today)) == changes(cards)
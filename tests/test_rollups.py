@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.rollups import GRANULARITIES, RollupCubes, period_label, period_of
+from app.store import from_day
+
+
+def brute_series(store, granularity, segments, start, end):
+    rows = (store.date >= start) & (store.date <= end)
+    if segments is not None:
+        rows &= segments[store.segment]
+    first, last = period_of(start, granularity), period_of(end, granularity)
+    totals = np.zeros(int(last) - int(first) + 1)
+    periods = period_of(store.date[rows].astype(np.int64), granularity)
+    np.add.at(totals, periods - first, store.revenue[rows])
+    long = from_day(start).year != from_day(end).year
+    return [
+        (period_label(int(first) + i, granularity, long), total)
+        for i, total in enumerate(totals)
+    ]
+
+
+def ranges(store):
+    """Day ranges cutting periods at both ends, within and past the data."""
+    first, last = int(store.date.min()), int(store.date.max())
+    rng = np.random.default_rng(3)
+    yield first, last
+    yield first - 10, last + 10
+    yield first + 3, first + 3
+    for _ in range(20):
+        start, end = sorted(rng.integers(first, last + 1, size=2).tolist())
+        yield start, end
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_series_matches_brute_force(store, granularity):
+    cubes = RollupCubes.from_store(store)
+    selections = [
+        None,
+        store.segment_selection(store.store_names[1], ()),
+        store.segment_selection("", store.category_names[:2]),
+    ]
+    for segments in selections:
+        for start, end in ranges(store):
+            lo, hi = cubes.day_range(start, end)
+            got = cubes.series(granularity, segments, start, end)
+            expected = brute_series(store, granularity, segments, lo, hi)
+            assert [label for label, _ in got] == [label for label, _ in expected]
+            np.testing.assert_allclose(
+                [value for _, value in got], [value for _, value in expected]
+            )
+
+
+def test_totals_match_brute_force(store):
+    cubes = RollupCubes.from_store(store)
+    segments = store.segment_selection(store.store_names[0], store.category_names[1:3])
+    for start, end in ranges(store):
+        rows = (store.date >= start) & (store.date <= end) & segments[store.segment]
+        revenue, count = cubes.totals(start, end, segments)
+        assert count == rows.sum()
+        assert revenue == pytest.approx(store.revenue[rows].sum())
+
+
+def test_appended_batches_match_a_rebuild(store):
+    cubes = RollupCubes(len(store.store_names), len(store.category_names))
+    # Later days first, so the cubes also grow towards earlier periods.
+    for part in np.array_split(np.arange(len(store)), 7)[::-1]:
+        cubes.append(store.date[part], store.segment[part], store.revenue[part])
+    rebuilt = RollupCubes.from_store(store)
+    for granularity in GRANULARITIES:
+        got, expected = cubes.series(granularity), rebuilt.series(granularity)
+        assert [label for label, _ in got] == [label for label, _ in expected]
+        np.testing.assert_allclose(
+            [value for _, value in got], [value for _, value in expected]
+        )
@@ -0,0 +1,80 @@
+import pytest
+
+from app.search import SearchIndex, trigrams
+
+NAMES = (
+    "Solar Panel",
+    "Solar Hat",
+    "Sun Hat",
+    "Hat Stand",
+    "Chrono-Gauntlet Watch",
+    "solo Cup",
+    "Aero-Graphene T-Shirt",
+    "Hats Off Poster",
+)
+
+
+def brute_search(names, query):
+    return [i for i, name in enumerate(names) if query.lower() in name.lower()]
+
+
+def brute_fuzzy(names, query, limit=10, min_score=0.5):
+    grams = trigrams(query.lower())
+    if not grams:
+        return []
+    scored = []
+    for i, name in enumerate(names):
+        shared = len(grams & trigrams(name.lower()))
+        if shared and shared / len(grams) >= min_score:
+            scored.append((-shared, i))
+    return [i for _, i in sorted(scored)[:limit]]
+
+
+@pytest.fixture(params=["fixed", "store"])
+def names(request, store):
+    return NAMES if request.param == "fixed" else store.product_names
+
+
+def test_search_matches_brute_force(names):
+    queries = [
+        "",
+        "s",
+        "so",
+        "sol",
+        "sola",
+        "solar",
+        "SOLAR p",
+        "hat",
+        "hats",
+        "at",
+        "t-s",
+        "zzz",
+        "-",
+        "watch",
+        "o",
+    ]
+    index = SearchIndex(names)
+    for query in queries:
+        assert index.search(query).tolist() == brute_search(names, query), query
+
+
+def test_typed_prefixes_match_brute_force(names):
+    # Each query extends the last, so lookups narrow cached matches.
+    index = SearchIndex(names, cache_size=4)
+    for word in ("solar panel", "hat stand", "aero-graphene"):
+        for end in range(1, len(word) + 1):
+            query = word[:end]
+            assert index.search(query).tolist() == brute_search(names, query), query
+
+
+def test_fuzzy_matches_brute_force(names):
+    index = SearchIndex(names)
+    for query in ("solr panl", "Aer-Graphen", "hat stnd", "chrono wach", "xyzzy"):
+        assert index.fuzzy(query).tolist() == brute_fuzzy(names, query), query
+
+
+def test_matching_falls_back_to_fuzzy():
+    index = SearchIndex(NAMES)
+    assert index.matching("solar").tolist() == brute_search(NAMES, "solar")
+    assert index.matching("solr hat").tolist() == sorted(brute_fuzzy(NAMES, "solr hat"))
+    assert index.matching("qqqq").tolist() == []
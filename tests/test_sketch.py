@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from app.sketch import ProductSketches
+
+
+def n_segments(store):
+    return len(store.store_names) * len(store.category_names)
+
+
+def brute_totals(store, start, end, segments):
+    rows = (store.date >= start) & (store.date <= end)
+    if segments is not None:
+        rows &= segments[store.segment]
+    units = np.bincount(
+        store.product_id[rows], weights=store.units[rows], minlength=store.n_products
+    )
+    revenue = np.bincount(
+        store.product_id[rows], weights=store.revenue[rows], minlength=store.n_products
+    )
+    return units, revenue
+
+
+def windows(store):
+    first, last = int(store.date.min()), int(store.date.max())
+    yield first, last, None
+    yield first + 40, first + 100, None
+    yield first, last, store.segment_selection(store.store_names[2], ())
+    yield last - 30, last, store.segment_selection("", store.category_names[:1])
+
+
+def append_in_batches(sketches, store, parts):
+    for part in parts:
+        sketches.append(
+            store.date[part],
+            store.segment[part],
+            store.product_id[part],
+            store.units[part],
+            store.revenue[part],
+        )
+
+
+def test_exact_with_room_for_every_product(store):
+    sketches = ProductSketches(n_segments(store), store.n_products, store.n_products)
+    rng = np.random.default_rng(5)
+    append_in_batches(sketches, store, np.array_split(rng.permutation(len(store)), 9))
+    for start, end, segments in windows(store):
+        units, revenue, bound = sketches.totals(start, end, segments)
+        expected_units, expected_revenue = brute_totals(store, start, end, segments)
+        np.testing.assert_allclose(units, expected_units)
+        np.testing.assert_allclose(revenue, expected_revenue)
+        assert bound == 0
+
+
+@pytest.mark.parametrize("shuffled", [False, True])
+def test_small_sketches_bound_the_exact_totals(store, shuffled):
+    sketches = ProductSketches(n_segments(store), store.n_products, capacity=3)
+    rows = np.arange(len(store))
+    if shuffled:
+        rows = np.random.default_rng(6).permutation(rows)
+    append_in_batches(sketches, store, np.array_split(rows, 13))
+    for start, end, segments in windows(store):
+        units, revenue, bound = sketches.totals(start, end, segments)
+        expected_units, expected_revenue = brute_totals(store, start, end, segments)
+        assert (units <= expected_units + 1e-9).all()
+        assert (revenue <= expected_revenue + 1e-6).all()
+        assert (expected_revenue - revenue <= bound + 1e-6).all()
+
+
+def test_batches_of_whole_days_merge_like_a_rebuild(store):
+    full = ProductSketches(n_segments(store), store.n_products, capacity=3)
+    append_in_batches(full, store, [np.arange(len(store))])
+    merged = ProductSketches(n_segments(store), store.n_products, capacity=3)
+    # Rows are sorted by date; cut between days, latest batches first so
+    # the day axis also grows backwards.
+    cuts = np.flatnonzero(np.diff(store.date)) + 1
+    parts = np.split(np.arange(len(store)), cuts[::50])
+    append_in_batches(merged, store, parts[::-1])
+    assert merged.first == full.first and len(merged) == len(full)
+    for name in ("product_id", "units", "dropped"):
+        np.testing.assert_array_equal(getattr(merged, name), getattr(full, name))
+    np.testing.assert_allclose(merged.revenue, full.revenue)
+
+
+def test_copy_is_independent(store):
+    sketches = ProductSketches.from_store(store)
+    copy = sketches.copy()
+    sketches.append(
+        store.date[:1] + 1000,
+        store.segment[:1],
+        store.product_id[:1],
+        store.units[:1],
+        store.revenue[:1],
+    )
+    assert len(copy) != len(sketches)
+    assert not np.shares_memory(copy.revenue, sketches.revenue)
@@ -0,0 +1,125 @@
+import json
+
+import numpy as np
+
+from app.rollups import GRANULARITIES, RollupCubes
+from app.sketch import ProductSketches
+from app.snapshot import (
+    FORMAT_VERSION,
+    KEEP_PREVIOUS,
+    SKETCH_ARRAYS,
+    current_name,
+    load_snapshot,
+    write_snapshot,
+)
+from app.store import COLUMNS, SalesStore
+
+
+def product_totals(store):
+    units = np.bincount(
+        store.product_id, weights=store.units, minlength=store.n_products
+    )
+    revenue = np.bincount(
+        store.product_id, weights=store.revenue, minlength=store.n_products
+    )
+    return units, revenue
+
+
+def write(root, store):
+    return write_snapshot(
+        root,
+        store,
+        RollupCubes.from_store(store),
+        *product_totals(store),
+        ProductSketches.from_store(store),
+    )
+
+
+def subset(store, rows):
+    return SalesStore(
+        store.store[rows],
+        store.category[rows],
+        store.product_id[rows],
+        store.date[rows],
+        store.units[rows],
+        store.revenue[rows],
+        store.store_names,
+        store.category_names,
+        store.product_names,
+    )
+
+
+def assert_snapshot_of(snapshot, store):
+    for column in (*COLUMNS, "segment"):
+        np.testing.assert_array_equal(
+            getattr(snapshot.store, column), getattr(store, column)
+        )
+    assert snapshot.store.product_names == store.product_names
+    cubes = RollupCubes.from_store(store)
+    for granularity in GRANULARITIES:
+        got, expected = snapshot.rollups.cubes[granularity], cubes.cubes[granularity]
+        assert got.first == expected.first
+        np.testing.assert_allclose(got.revenue, expected.revenue)
+        np.testing.assert_array_equal(got.count, expected.count)
+    units, revenue = product_totals(store)
+    np.testing.assert_array_equal(snapshot.product_units, units)
+    np.testing.assert_allclose(snapshot.product_revenue, revenue)
+    sketches = ProductSketches.from_store(store)
+    assert snapshot.sketches.first == sketches.first
+    for name in SKETCH_ARRAYS:
+        np.testing.assert_allclose(
+            getattr(snapshot.sketches, name), getattr(sketches, name)
+        )
+
+
+def test_write_load_round_trip(tmp_path, store):
+    path = write(tmp_path, store)
+    assert current_name(tmp_path) == path.name
+    snapshot = load_snapshot(tmp_path)
+    assert snapshot.name == path.name
+    assert_snapshot_of(snapshot, store)
+
+
+def test_appending_to_a_loaded_snapshot(tmp_path, store):
+    # Cut between two days, so the second part only holds later ones.
+    cut = int(np.searchsorted(store.date, store.date[len(store) * 2 // 3]))
+    write(tmp_path, subset(store, slice(0, cut)))
+    snapshot = load_snapshot(tmp_path)
+    rows = slice(cut, len(store))
+    snapshot.store.append(
+        store.store[rows],
+        store.category[rows],
+        store.product_id[rows],
+        store.date[rows],
+        store.units[rows],
+        store.revenue[rows],
+    )
+    snapshot.rollups.append(store.date[rows], store.segment[rows], store.revenue[rows])
+    snapshot.sketches.append(
+        store.date[rows],
+        store.segment[rows],
+        store.product_id[rows],
+        store.units[rows],
+        store.revenue[rows],
+    )
+    units, revenue = snapshot.product_units.copy(), snapshot.product_revenue.copy()
+    np.add.at(units, store.product_id[rows], store.units[rows])
+    np.add.at(revenue, store.product_id[rows], store.revenue[rows])
+    write_snapshot(
+        tmp_path,
+        snapshot.store.frozen(),
+        snapshot.rollups,
+        units,
+        revenue,
+        snapshot.sketches.copy(),
+    )
+    assert_snapshot_of(load_snapshot(tmp_path), store)
+    assert len(list(tmp_path.glob("snapshot-*"))) == 1 + KEEP_PREVIOUS
+
+
+def test_missing_or_other_format_loads_nothing(tmp_path, store):
+    assert load_snapshot(tmp_path) is None
+    manifest = write(tmp_path, store) / "manifest.json"
+    content = json.loads(manifest.read_text())
+    manifest.write_text(json.dumps({**content, "format": FORMAT_VERSION + 1}))
+    assert load_snapshot(tmp_path) is None
@@ -0,0 +1,131 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.engine import Filters, aggregate
+from app.rollups import GRANULARITIES, RollupCubes
+from app.sql import SqlSource
+from app.store import from_day
+from app.topk import SORT_KEYS, select
+
+
+@pytest.fixture(scope="module")
+def source(store, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sql") / "sales.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE sales (date TEXT, store TEXT, category TEXT, product TEXT, "
+        "units INTEGER, revenue REAL)"
+    )
+    connection.executemany(
+        "INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                from_day(day).isoformat(),
+                store.store_names[code],
+                store.category_names[category],
+                store.product_names[product],
+                int(units),
+                float(revenue),
+            )
+            for day, code, category, product, units, revenue in zip(
+                store.date,
+                store.store,
+                store.category,
+                store.product_id,
+                store.units,
+                store.revenue,
+            )
+        ),
+    )
+    connection.commit()
+    connection.close()
+    return SqlSource(path, pool_size=2)
+
+
+def selections(store):
+    first, last = int(store.date.min()), int(store.date.max())
+    yield Filters()
+    yield Filters(store=store.store_names[1])
+    yield Filters(categories=store.category_names[1:3])
+    yield Filters(
+        store.store_names[0],
+        store.category_names[:2],
+        from_day(first + 50).isoformat(),
+        from_day(last - 200).isoformat(),
+    )
+
+
+def test_series_and_totals_match_the_rollups(store, source):
+    cubes = RollupCubes.from_store(store)
+    assert source.day_range() == cubes.day_range()
+    first, last = cubes.day_range()
+    for filters in selections(store):
+        segments = store.segment_selection(filters.store, filters.categories)
+        for start, end in ((first, last), (first + 17, first + 90), (last, last)):
+            for granularity in GRANULARITIES:
+                got = source.series(granularity, filters, start, end)
+                expected = cubes.series(granularity, segments, start, end)
+                assert [label for label, _ in got] == [label for label, _ in expected]
+                np.testing.assert_allclose(
+                    [value for _, value in got], [value for _, value in expected]
+                )
+            revenue, count = source.totals(filters, start, end)
+            expected_revenue, expected_count = cubes.totals(start, end, segments)
+            assert count == expected_count
+            assert revenue == pytest.approx(expected_revenue)
+
+
+def expected_rows(store, filters, sort_by, descending):
+    result = aggregate(store, filters)
+    units, revenue = result.product_units, result.product_revenue
+    candidates = np.flatnonzero(units)
+    if sort_by == "name":
+        ids = sorted(candidates, key=store.product_names.__getitem__)
+        ids = ids[::-1] if descending else ids
+    else:
+        values = units if sort_by == "units_sold" else revenue
+        ids = select(values, candidates, descending, len(candidates))
+    return [
+        {
+            "name": store.product_names[i],
+            "units_sold": int(units[i]),
+            "total_revenue": round(float(revenue[i]), 2),
+        }
+        for i in ids
+    ]
+
+
+def test_product_pages_match_topk(store, source):
+    for filters in selections(store):
+        for sort_by in SORT_KEYS:
+            for descending in (True, False):
+                expected = expected_rows(store, filters, sort_by, descending)
+                got = []
+                for page in range(-(-len(expected) // 3)):
+                    rows, count, shown = source.product_page(
+                        filters, "", sort_by, descending, page, 3
+                    )
+                    assert (count, shown) == (len(expected), page)
+                    got.extend(rows)
+                for row in got:
+                    assert row.pop("id") == source.product_ids[row["name"]]
+                # Products tied on the sort key may be listed in either order.
+                assert [row[sort_by] for row in got] == [
+                    row[sort_by] for row in expected
+                ]
+                assert sorted(got, key=repr) == sorted(expected, key=repr)
+
+
+def test_product_page_and_window_clamp(store, source):
+    filters = Filters(store=store.store_names[2])
+    n = len(expected_rows(store, filters, "name", False))
+    rows, count, page = source.product_page(filters, "", "name", False, 99, 4)
+    assert (count, page, len(rows)) == (n, (n - 1) // 4, n - (n - 1) // 4 * 4)
+    rows, count, start = source.product_window(filters, "", "name", False, 99, 4)
+    assert (count, start, len(rows)) == (n, n - 4, 4)
+    names = [
+        row["name"] for row in source.product_page(filters, "o", "name", False, 0, n)[0]
+    ]
+    assert names == sorted(name for name in store.product_names if "o" in name.lower())
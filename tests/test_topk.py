@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.topk import SORT_KEYS, TopKIndex
+
+
+def brute_top(names, units, revenue, sold, key, descending, stop):
+    """The first ``stop`` sold ids in ``key`` order, ties broken by id."""
+    rank = {
+        i: r for r, i in enumerate(sorted(range(len(names)), key=names.__getitem__))
+    }
+    values = {
+        "name": rank,
+        "units_sold": units.tolist(),
+        "total_revenue": revenue.tolist(),
+    }[key]
+    sign = -1 if descending else 1
+    return sorted(sold, key=lambda i: (sign * values[i], i))[:stop]
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(11)
+    n = 300
+    names = tuple(f"Product {i:03d} {rng.integers(1000)}" for i in range(n))
+    units = rng.integers(0, 20, size=n)
+    units[rng.random(n) < 0.2] = 0
+    revenue = units * rng.uniform(1, 50, size=n)
+    return names, units, revenue
+
+
+def check(index, names, units, revenue, sold):
+    for key in SORT_KEYS:
+        for descending in (True, False):
+            for stop in (1, 5, index.k, index.k + 7, len(names)):
+                assert index.top(key, descending, stop).tolist() == brute_top(
+                    names, units, revenue, sold, key, descending, stop
+                ), (key, descending, stop)
+
+
+def test_add_sales_matches_brute_force(catalog):
+    names, units, revenue = catalog
+    index = TopKIndex(names, units, revenue, 20)
+    units, revenue = units.astype(np.int64), revenue.astype(np.float64)
+    sold = set(np.flatnonzero(units).tolist())
+    check(index, names, units, revenue, sold)
+    rng = np.random.default_rng(12)
+    for batch in range(12):
+        size = int(rng.integers(1, 40))
+        product_id = rng.integers(0, len(names), size=size)
+        sold_units = rng.integers(1, 5, size=size)
+        sold_revenue = sold_units * rng.uniform(1, 50, size=size)
+        if batch == 7:
+            # Returns take totals down.
+            sold_units, sold_revenue = -sold_units, -sold_revenue
+        index.add_sales(product_id, sold_units, sold_revenue)
+        np.add.at(units, product_id, sold_units)
+        np.add.at(revenue, product_id, sold_revenue)
+        # A product stays listed once sold, even if returns cancel it out.
+        sold |= set(product_id.tolist())
+        check(index, names, units, revenue, sold)
+
+
+def test_newly_sold_products_enter_the_tables(catalog):
+    names, units, revenue = catalog
+    index = TopKIndex(names, units, revenue, 10)
+    sold = set(np.flatnonzero(units).tolist())
+    check(index, names, units, revenue, sold)
+    unsold = np.flatnonzero(units == 0)[:3]
+    index.add_sales(unsold, np.full(3, 1000), np.full(3, 1e6))
+    units, revenue = units.copy(), revenue.copy()
+    units[unsold] += 1000
+    revenue[unsold] += 1e6
+    check(index, names, units, revenue, sold | set(unsold.tolist()))
+    assert set(index.top("total_revenue", True, 3).tolist()) == set(unsold.tolist())